@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import Base
 from app.models import *
+from app.models_enhanced import *
 from app.config import settings
 
 # this is the Alembic Config object
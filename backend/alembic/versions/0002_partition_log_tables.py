@@ -0,0 +1,144 @@
+"""partition log tables by month, add log rollups
+
+Rebuilds logs and campaign_logs as PostgreSQL range-partitioned tables on
+timestamp with one partition per month (plus a default partition), and
+creates the hourly / daily rollup tables used once raw partitions expire.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:05:00.000000
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 2
+
+LOG_TABLES = {
+    'logs': """
+        id INTEGER NOT NULL DEFAULT nextval('logs_id_seq'),
+        campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+        contact_id INTEGER REFERENCES contacts (id),
+        status messagestatus NOT NULL,
+        detail TEXT,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        PRIMARY KEY (id, timestamp)
+    """,
+    'campaign_logs': """
+        id INTEGER NOT NULL DEFAULT nextval('campaign_logs_id_seq'),
+        campaign_id INTEGER NOT NULL REFERENCES campaigns_enhanced (id),
+        contact_id INTEGER REFERENCES campaign_contacts (id),
+        log_type VARCHAR(50) NOT NULL,
+        message TEXT NOT NULL,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        metadata JSON,
+        PRIMARY KEY (id, timestamp)
+    """,
+}
+
+LOG_COLUMNS = {
+    'logs': 'id, campaign_id, contact_id, status, detail, timestamp',
+    'campaign_logs': 'id, campaign_id, contact_id, log_type, message, timestamp, metadata',
+}
+
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def _create_rollup_table(name):
+    op.create_table(name,
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'campaign_id', 'bucket', 'kind')
+    )
+
+
+def _partition_table(bind, table):
+    legacy = f'{table}_legacy'
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    op.execute(f'ALTER INDEX ix_{table}_id RENAME TO ix_{legacy}_id')
+    op.execute(f'ALTER INDEX ix_{table}_timestamp RENAME TO ix_{legacy}_timestamp')
+    op.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey')
+    # Keep the id sequence alive when the legacy table is dropped
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+    op.execute(f'CREATE TABLE {table} ({LOG_TABLES[table]}) PARTITION BY RANGE (timestamp)')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'CREATE INDEX ix_{table}_id ON {table} (id)')
+    op.execute(f'CREATE INDEX ix_{table}_timestamp ON {table} (timestamp)')
+    op.execute(f'CREATE INDEX ix_{table}_campaign_id ON {table} (campaign_id)')
+
+    # One partition per month from the oldest existing row up to the premake horizon
+    # Months are UTC calendar months, as in app.services.log_retention
+    oldest = bind.execute(sa.text(f'SELECT min(timestamp) FROM {legacy}')).scalar()
+    now = datetime.now(timezone.utc)
+    month = (oldest.astimezone(timezone.utc) if oldest else now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    horizon = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), PREMAKE_MONTHS)
+    while month <= horizon:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+        )
+        month = end
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    columns = LOG_COLUMNS[table]
+    op.execute(
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT {columns.replace('timestamp', 'COALESCE(timestamp, now())')} FROM {legacy}"
+    )
+    op.execute(f'DROP TABLE {legacy}')
+
+
+def _unpartition_table(table):
+    partitioned = f'{table}_partitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+    op.execute(f'ALTER INDEX ix_{table}_id RENAME TO ix_{partitioned}_id')
+    op.execute(f'ALTER INDEX ix_{table}_timestamp RENAME TO ix_{partitioned}_timestamp')
+    op.execute(f'ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey')
+    op.execute(f'DROP INDEX ix_{table}_campaign_id')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+    definition = LOG_TABLES[table].replace('PRIMARY KEY (id, timestamp)', 'PRIMARY KEY (id)')
+    op.execute(f'CREATE TABLE {table} ({definition})')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'CREATE INDEX ix_{table}_id ON {table} (id)')
+    op.execute(f'CREATE INDEX ix_{table}_timestamp ON {table} (timestamp)')
+
+    columns = LOG_COLUMNS[table]
+    op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {partitioned}')
+    op.execute(f'DROP TABLE {partitioned}')
+
+
+def upgrade() -> None:
+    _create_rollup_table('log_rollups_hourly')
+    _create_rollup_table('log_rollups_daily')
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for table in LOG_TABLES:
+        _partition_table(bind, table)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in LOG_TABLES:
+            _unpartition_table(table)
+
+    op.drop_table('log_rollups_daily')
+    op.drop_table('log_rollups_hourly')
@@ -0,0 +1,25 @@
+"""add DELETING campaign status
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 13:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TYPE campaignstatus ADD VALUE IF NOT EXISTS 'DELETING'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop a value from an enum type; DELETING is left in place
+    pass
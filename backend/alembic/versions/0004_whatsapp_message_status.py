@@ -0,0 +1,40 @@
+"""store WhatsApp message ids and delivery receipts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TYPE messagestatus ADD VALUE IF NOT EXISTS 'READ' AFTER 'DELIVERED'")
+
+    op.add_column('contacts', sa.Column('provider_message_id', sa.String(length=128), nullable=True))
+    op.create_index(op.f('ix_contacts_provider_message_id'), 'contacts', ['provider_message_id'], unique=True)
+
+    op.add_column('campaign_contacts', sa.Column('provider_message_id', sa.String(length=128), nullable=True))
+    op.add_column('campaign_contacts', sa.Column('read_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('campaign_contacts', sa.Column('error_code', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_campaign_contacts_provider_message_id'), 'campaign_contacts', ['provider_message_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_campaign_contacts_provider_message_id'), table_name='campaign_contacts')
+    op.drop_column('campaign_contacts', 'error_code')
+    op.drop_column('campaign_contacts', 'read_at')
+    op.drop_column('campaign_contacts', 'provider_message_id')
+
+    op.drop_index(op.f('ix_contacts_provider_message_id'), table_name='contacts')
+    op.drop_column('contacts', 'provider_message_id')
+    # PostgreSQL cannot drop a value from an enum type; READ is left in place
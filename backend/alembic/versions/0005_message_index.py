@@ -0,0 +1,41 @@
+"""add message index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('message_index',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.String(length=128), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=True),
+    sa.Column('contact_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('status_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_message_index_id'), 'message_index', ['id'], unique=False)
+    op.create_index(op.f('ix_message_index_message_id'), 'message_index', ['message_id'], unique=True)
+    op.create_index(op.f('ix_message_index_campaign_id'), 'message_index', ['campaign_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_message_index_campaign_id'), table_name='message_index')
+    op.drop_index(op.f('ix_message_index_message_id'), table_name='message_index')
+    op.drop_index(op.f('ix_message_index_id'), table_name='message_index')
+    op.drop_table('message_index')
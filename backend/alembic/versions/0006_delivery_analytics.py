@@ -0,0 +1,54 @@
+"""add delivery analytics rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('campaign_delivery_stats_hourly',
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sent', sa.Integer(), nullable=False),
+    sa.Column('delivered', sa.Integer(), nullable=False),
+    sa.Column('read', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('latency_sum_seconds', sa.Float(), nullable=False),
+    sa.Column('latency_histogram', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns_enhanced.id'], ),
+    sa.PrimaryKeyConstraint('campaign_id', 'hour')
+    )
+    op.create_table('campaign_error_stats_hourly',
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('error_code', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns_enhanced.id'], ),
+    sa.PrimaryKeyConstraint('campaign_id', 'hour', 'error_code')
+    )
+    # The rollup window is selected on this expression
+    op.execute(
+        "CREATE INDEX ix_campaign_contacts_cohort_at "
+        "ON campaign_contacts ((COALESCE(sent_at, failed_at)))"
+    )
+    op.create_index('ix_campaign_delivery_stats_hourly_hour', 'campaign_delivery_stats_hourly', ['hour'], unique=False)
+    op.create_index('ix_campaign_error_stats_hourly_hour', 'campaign_error_stats_hourly', ['hour'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_campaign_error_stats_hourly_hour', table_name='campaign_error_stats_hourly')
+    op.drop_index('ix_campaign_delivery_stats_hourly_hour', table_name='campaign_delivery_stats_hourly')
+    op.execute("DROP INDEX IF EXISTS ix_campaign_contacts_cohort_at")
+    op.drop_table('campaign_error_stats_hourly')
+    op.drop_table('campaign_delivery_stats_hourly')
@@ -0,0 +1,23 @@
+"""index licenses by status and expiry
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 17:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_licenses_status_expires_at', 'licenses', ['status', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_licenses_status_expires_at', table_name='licenses')
@@ -0,0 +1,44 @@
+"""add trigram and prefix indexes for license search
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 17:55:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pg_trgm and operator classes only exist on PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built concurrently so large licenses tables stay writable during the upgrade
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_human_key_prefix "
+            "ON licenses (human_key varchar_pattern_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_owner_email_trgm "
+            "ON licenses USING gin (owner_email gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_human_key_trgm "
+            "ON licenses USING gin (human_key gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_licenses_human_key_trgm', table_name='licenses')
+    op.drop_index('ix_licenses_owner_email_trgm', table_name='licenses')
+    op.drop_index('ix_licenses_human_key_prefix', table_name='licenses')
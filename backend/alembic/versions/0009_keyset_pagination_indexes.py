@@ -0,0 +1,44 @@
+"""add keyset pagination indexes for admin lists
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_licenses_issued_at_id', 'licenses', ['issued_at', 'id']),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False)
+        return
+
+    # Built concurrently so the admin tables stay writable during the upgrade
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_issued_at_id "
+            "ON licenses (issued_at, id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id "
+            "ON users (created_at, id)"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_licenses_issued_at_id', table_name='licenses')
@@ -0,0 +1,41 @@
+"""add daily revenue and license rollups
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('revenue_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('plan', sa.String(length=50), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('payments', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'currency', 'provider', 'plan')
+    )
+    op.create_table('license_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('plan', sa.String(length=50), nullable=False),
+    sa.Column('issued', sa.Integer(), nullable=False),
+    sa.Column('activated', sa.Integer(), nullable=False),
+    sa.Column('expired', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'plan')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('license_daily')
+    op.drop_table('revenue_daily')
@@ -0,0 +1,63 @@
+"""add composite indexes for hot router queries
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_contacts_campaign_id_status', 'contacts', ['campaign_id', 'status']),
+    ('ix_devices_license_id_hwid', 'devices', ['license_id', 'hwid']),
+    ('ix_campaigns_user_id_created_at', 'campaigns', ['user_id', 'created_at']),
+    ('ix_payments_user_id_created_at', 'payments', ['user_id', 'created_at']),
+]
+
+LOGS_INDEX = ('ix_logs_contact_id_timestamp', 'logs', ['contact_id', 'timestamp'])
+
+
+def _create_partitioned_index(bind, name: str, table: str, columns) -> None:
+    """
+    CONCURRENTLY is not allowed on a partitioned parent, so the parent index
+    is created invalid with ON ONLY, each partition is indexed concurrently
+    and attached; the parent becomes valid once every partition is attached.
+    """
+    column_list = ', '.join(columns)
+    op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({column_list})')
+    partitions = bind.execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:table AS regclass)"
+    ), {'table': table}).scalars().all()
+    for partition in partitions:
+        partition_index = f"{partition}_{'_'.join(columns)}_idx"
+        op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({column_list})')
+        op.execute(f'ALTER INDEX {name} ATTACH PARTITION {partition_index}')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        for name, table, columns in INDEXES + [LOGS_INDEX]:
+            op.create_index(name, table, columns, unique=False)
+        return
+
+    # Built concurrently so the busiest tables stay writable during the upgrade
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        # logs is range-partitioned (0002); partitions created later inherit the index
+        _create_partitioned_index(bind, *LOGS_INDEX)
+
+
+def downgrade() -> None:
+    # Dropping a partitioned index drops the attached partition indexes too
+    for name, table, _ in reversed(INDEXES + [LOGS_INDEX]):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+"""store filterable JSON columns as jsonb with GIN indexes
+
+Converting the column type rewrites each table under an exclusive lock, so
+run this upgrade in a maintenance window on large contact lists.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 20:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = [
+    ('contacts', 'custom', 'ix_contacts_custom_gin'),
+    ('campaign_contacts', 'variables', 'ix_campaign_contacts_variables_gin'),
+    ('licenses', 'meta_data', 'ix_licenses_meta_data_gin'),
+]
+
+
+def upgrade() -> None:
+    # JSON stays JSON on other databases; only PostgreSQL has jsonb and GIN
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, _ in JSONB_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb')
+    with op.get_context().autocommit_block():
+        for table, column, index in JSONB_COLUMNS:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} "
+                f"ON {table} USING gin ({column} jsonb_path_ops)"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, index in reversed(JSONB_COLUMNS):
+        op.drop_index(index, table_name=table)
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json')
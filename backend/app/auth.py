@@ -1,18 +1,65 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from passlib.hash import argon2
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import TTLCache
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, UserRole
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 
+def _build_pwd_context() -> CryptContext:
+    """
+    The configured scheme hashes new passwords; the other one only verifies
+    existing hashes. Hashes made with other schemes or cost parameters are
+    flagged for rehashing on the next successful login.
+    """
+    schemes = ["bcrypt"]
+    if argon2.has_backend():
+        schemes = ["argon2", "bcrypt"] if settings.PASSWORD_HASH_SCHEME == "argon2" else ["bcrypt", "argon2"]
+    elif settings.PASSWORD_HASH_SCHEME == "argon2":
+        logger.warning("PASSWORD_HASH_SCHEME=argon2 but argon2-cffi is not installed; using bcrypt")
+    
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_desired_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__max_desired_rounds=settings.BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST_KB,
+        argon2__parallelism=settings.ARGON2_PARALLELISM
+    )
+
+
+pwd_context = _build_pwd_context()
+
+# Hashing is CPU-bound; a small dedicated pool keeps login bursts off the event loop
+# and from occupying the default executor other handlers use
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+
+# Token subject (email) -> the user fields request handlers rely on
+user_cache = TTLCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    redis_prefix="authuser:" if settings.USER_CACHE_USE_REDIS else None,
+    # Deactivations and role changes must reach every API process's local copy
+    invalidation_channel="authuser:invalidate"
+)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -21,6 +68,20 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """get_password_hash on the hashing pool, for use in request handlers"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify on the hashing pool; returns a replacement hash when the stored one is outdated"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -52,7 +113,7 @@ def decode_token(token: str) -> dict:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     token = credentials.credentials
     payload = decode_token(token)
@@ -64,7 +125,7 @@ async def get_current_user(
     if email is None:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user = db.query(User).filter(User.email == email).first()
+    user = await _load_user(email, db)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -74,6 +135,45 @@ async def get_current_user(
     return user
 
 
+def _cache_entry(user: User) -> dict:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "role": user.role.name,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "last_login": user.last_login.isoformat() if user.last_login else None,
+    }
+
+
+async def _load_user(email: str, db: AsyncSession) -> Optional[User]:
+    """
+    Resolve a token subject, from the cache when possible. Cached users are
+    transient User objects: only the columns are set, relationships are not loaded.
+    """
+    entry = user_cache.get(email)
+    if entry is None:
+        user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+        if user is None:
+            return None
+        user_cache.set(email, _cache_entry(user))
+        return user
+    
+    return User(
+        id=entry["id"],
+        email=entry["email"],
+        role=UserRole[entry["role"]],
+        is_active=entry["is_active"],
+        created_at=datetime.fromisoformat(entry["created_at"]) if entry["created_at"] else None,
+        last_login=datetime.fromisoformat(entry["last_login"]) if entry["last_login"] else None
+    )
+
+
+def invalidate_user_cache(email: str) -> None:
+    """Call after changing a user's active flag, role or profile fields"""
+    user_cache.delete(email)
+
+
 async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -0,0 +1,156 @@
+"""
+In-process TTL cache with an optional Redis second tier
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import redis
+
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds. When a
+    `redis_prefix` is given, misses fall through to Redis (JSON values) so
+    API processes warm each other. After a Redis error the second tier is
+    skipped for `redis_retry_seconds` so a Redis outage never slows callers.
+
+    With an `invalidation_channel`, delete() is broadcast over Redis pub/sub
+    and start() subscribes, so every process drops its in-process copy. Once
+    started, the in-process tier is bypassed while unsubscribed, since it
+    could miss invalidations.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = 10000,
+        redis_prefix: Optional[str] = None,
+        redis_retry_seconds: float = 30.0,
+        invalidation_channel: Optional[str] = None,
+        reconnect_delay: float = 5.0
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.redis_prefix = redis_prefix
+        self.redis_retry_seconds = redis_retry_seconds
+        self.invalidation_channel = invalidation_channel
+        self.reconnect_delay = reconnect_delay
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+        self._listening = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _redis_available(self) -> bool:
+        return self.redis_prefix is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Cache second tier unavailable: {str(e)}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+
+    def _local_usable(self) -> bool:
+        # Not started (scripts, tests): a single process can't miss invalidations
+        return self.invalidation_channel is None or self._thread is None or self._listening.is_set()
+
+    def _set_local(self, key: str, value: Any) -> None:
+        if not self._local_usable():
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key) if self._local_usable() else None
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        if not self._redis_available():
+            return None
+        try:
+            raw = redis_client.get(f"{self.redis_prefix}{key}")
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._set_local(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._set_local(key, value)
+        if not self._redis_available():
+            return
+        try:
+            redis_client.set(f"{self.redis_prefix}{key}", json.dumps(value), ex=max(int(self.ttl), 1))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.redis_prefix is not None:
+            try:
+                redis_client.delete(f"{self.redis_prefix}{key}")
+            except redis.RedisError as e:
+                # A stale Redis copy still expires after ttl
+                self._redis_failed(e)
+        if self.invalidation_channel is not None:
+            try:
+                redis_client.publish(self.invalidation_channel, key)
+            except redis.RedisError as e:
+                logger.warning(f"Could not broadcast cache invalidation: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+
+    def start(self) -> None:
+        """Subscribe to the invalidation channel (no-op without one)"""
+        if self.invalidation_channel is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._listen, name=f"cache-{self.invalidation_channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stop_event.is_set():
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.invalidation_channel)
+                self._listening.set()
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        with self._lock:
+                            self._entries.pop(message["data"].decode(), None)
+            except redis.RedisError as e:
+                logger.warning(f"Cache invalidation subscription {self.invalidation_channel} lost: {str(e)}")
+            finally:
+                # Invalidations may be missed while unsubscribed
+                self._listening.clear()
+                self.clear()
+                pubsub.close()
+            self._stop_event.wait(self.reconnect_delay)
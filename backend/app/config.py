@@ -1,13 +1,28 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./test.db"
+    # Async driver URL; derived from DATABASE_URL (asyncpg / aiosqlite) when empty
+    ASYNC_DATABASE_URL: str = ""
+    # Per-engine pool; the sync engine (worker, unmigrated routers) and the async engine each get one
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 10.0
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    # Read replicas as comma-separated sync URLs; read-only endpoints use them when set
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    # After a successful write, the same client reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS: int = 10
     
     # Redis
     REDIS_URL: str
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 2.0
     
     # JWT
     JWT_SECRET: str
@@ -15,8 +30,34 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     
+    # Password hashing (argon2 requires the argon2-cffi package)
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # bcrypt or argon2
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KB: int = 65536
+    ARGON2_PARALLELISM: int = 2
+    PASSWORD_HASH_WORKERS: int = 4
+    
     # License
     LICENSE_OFFLINE_DAYS: int = 7
+    LICENSE_BATCH_MAX: int = 1000
+    LICENSE_HEARTBEAT_FLUSH_SECONDS: int = 30
+    LICENSE_EXPIRY_SWEEP_SECONDS: int = 60
+    LICENSE_CACHE_TTL_SECONDS: int = 300
+    LICENSE_CACHE_MAX_SIZE: int = 100000
+    LICENSE_KEY_CACHE_TTL_SECONDS: int = 86400
+    LICENSE_SEARCH_CACHE_SECONDS: int = 15
+    LICENSE_SEARCH_COUNT_CAP: int = 10000
+    LIST_COUNT_CACHE_SECONDS: int = 60
+    # Per-user cached GET responses with ETags; writes invalidate, the TTL is a backstop
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 120
+    # RS256 license signing; retired keys as "kid=/path/public.pem,..." stay in the JWKS
+    LICENSE_PRIVATE_KEY_FILE: str = ""
+    LICENSE_KEY_ID: str = "license-1"
+    LICENSE_RETIRED_PUBLIC_KEYS: str = ""
+    # Accept licenses signed with JWT_SECRET (HS256) while old installs are reissued
+    LICENSE_ACCEPT_HS256: bool = False
     MAX_DEVICES_DEFAULT: int = 1
     
     # SMTP
@@ -40,10 +81,57 @@ class Settings(BaseSettings):
     WHATSAPP_PHONE_NUMBER_ID: str = ""
     WHATSAPP_ACCESS_TOKEN: str = ""
     WHATSAPP_VERIFY_TOKEN: str = ""  # For webhook verification
+    WHATSAPP_APP_SECRET: str = ""  # Verifies X-Hub-Signature-256 on webhook payloads
+    
+    # WhatsApp webhook ingestion
+    WEBHOOK_QUEUE_KEY: str = "whatsapp:webhook:events"
+    WEBHOOK_DEAD_LETTER_KEY: str = "whatsapp:webhook:dead"
+    WEBHOOK_BATCH_SIZE: int = 500
+    WEBHOOK_CONSUMERS: int = 2
+    MESSAGE_CACHE_TTL_SECONDS: int = 86400
     
     # Security
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    # Per-route overrides as "path=limit_per_minute", each with its own bucket
+    RATE_LIMIT_ROUTES: str = "/api/v1/auth/login=10,/api/v1/auth/register=10,/api/v1/licenses/validate=120,/api/v1/whatsapp/send-text=30"
+    RATE_LIMIT_EXEMPT_PATHS: str = "/,/api/v1/health,/api/docs,/api/redoc,/openapi.json,/api/v1/whatsapp/webhook"
+    
+    # Authenticated user cache (in-process, Redis as second tier)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_USE_REDIS: bool = True
+    
+    # Log writer (batched inserts into logs / campaign_logs)
+    LOG_BATCH_SIZE: int = 500
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOG_QUEUE_MAX_SIZE: int = 20000
+    
+    # Log partitions, retention and rollups
+    LOG_RETENTION_MONTHS: int = 6
+    LOG_PARTITION_PREMAKE_MONTHS: int = 2
+    LOG_ROLLUP_LOOKBACK_HOURS: int = 3
+    LOG_ROLLUP_HOURLY_RETENTION_DAYS: int = 90
+    LOG_MAINTENANCE_INTERVAL_SECONDS: int = 900
+    # DDL gives up (and retries next run) rather than queue behind live queries
+    LOG_MAINTENANCE_LOCK_TIMEOUT_SECONDS: float = 2.0
+    
+    # Campaign deletion (background purge)
+    CAMPAIGN_DELETE_CHUNK_SIZE: int = 5000
+    CAMPAIGN_DELETE_THROTTLE_SECONDS: float = 0.05
+    CAMPAIGN_PURGE_INTERVAL_SECONDS: int = 30
+    
+    # Delivery analytics rollups
+    ANALYTICS_ROLLUP_LOOKBACK_HOURS: int = 48
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 300
+    
+    # Daily revenue / license rollups, rebuilt nightly over the lookback window
+    DAILY_ROLLUP_INTERVAL_SECONDS: int = 86400
+    DAILY_ROLLUP_LOOKBACK_DAYS: int = 3
+    
+    # Admin dashboard counters are rebuilt from the database this often
+    ADMIN_STATS_RECONCILE_SECONDS: int = 600
     
     # Monitoring
     SENTRY_DSN: str = ""
@@ -55,6 +143,32 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def rate_limit_routes(self) -> Dict[str, int]:
+        routes = {}
+        for item in self.RATE_LIMIT_ROUTES.split(","):
+            if "=" in item:
+                path, limit = item.rsplit("=", 1)
+                routes[path.strip()] = int(limit)
+        return routes
+    
+    @property
+    def license_retired_public_keys(self) -> Dict[str, str]:
+        keys = {}
+        for item in self.LICENSE_RETIRED_PUBLIC_KEYS.split(","):
+            if "=" in item:
+                kid, path = item.split("=", 1)
+                keys[kid.strip()] = path.strip()
+        return keys
+    
+    @property
+    def rate_limit_exempt_paths(self) -> List[str]:
+        return [path.strip() for path in self.RATE_LIMIT_EXEMPT_PATHS.split(",") if path.strip()]
+    
+    @property
+    def database_replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,34 @@
+"""
+Fast JSON
+orjson serialisation for API responses. Datetimes, dates, UUIDs and enums are
+encoded natively (same ISO 8601 text as .isoformat()), Decimals as floats, so
+list endpoints can hand over raw column tuples instead of building and
+re-encoding dicts field by field.
+"""
+from decimal import Decimal
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def records(fields: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    """Name the columns of result tuples, e.g. from select(Model.a, Model.b)"""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class; return it directly to skip FastAPI's jsonable_encoder pass"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
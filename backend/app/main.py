@@ -2,8 +2,15 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
-from app.database import engine, Base
-from app.routers import auth, licenses, campaigns, payments, admin, health, whatsapp
+from app.auth import user_cache
+from app.database import async_engine
+from app.fast_json import FastJSONResponse
+from app.routers import auth, licenses, campaigns, payments, admin, health, whatsapp, analytics
+from app.rate_limit import RateLimitMiddleware
+from app.replicas import ReadYourWritesMiddleware, replica_set
+from app.services.log_writer import log_writer
+from app.services import license_signing
+from app.services.license_cache import license_cache
 import time
 
 # Initialize Sentry (optional)
@@ -19,8 +26,7 @@ try:
 except ImportError:
     pass  # Sentry not installed, skip
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (alembic upgrade head), not at startup
 
 app = FastAPI(
     title="MyWASender API",
@@ -28,8 +34,15 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse,
 )
 
+# Pin clients to the primary after writes when read replicas are configured
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +61,25 @@ async def add_process_time_header(request: Request, call_next):
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+# Background services
+@app.on_event("startup")
+async def start_background_services():
+    license_signing.check_configuration()
+    log_writer.start()
+    license_cache.start()
+    user_cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    license_cache.stop()
+    user_cache.stop()
+    # Flush buffered log rows before the process exits
+    log_writer.stop()
+    await async_engine.dispose()
+    for replica in replica_set.replicas:
+        await replica.async_engine.dispose()
+
 # Exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -64,6 +96,7 @@ app.include_router(campaigns.router, prefix="/api/v1/campaigns", tags=["Campaign
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 app.include_router(whatsapp.router, prefix="/api/v1/whatsapp", tags=["WhatsApp"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
 @app.get("/")
 async def root():
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Numeric, JSON, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Text, Numeric, JSON, Index, DDL, event, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid as uuid_lib
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,9 @@ from app.database import Base
 import uuid
 import enum
 
+# JSON documents that are filtered on: JSONB (GIN-indexable) on PostgreSQL
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 
 class UserRole(str, enum.Enum):
     USER = "user"
@@ -28,6 +31,7 @@ class CampaignStatus(str, enum.Enum):
     PAUSED = "paused"
     COMPLETED = "completed"
     FAILED = "failed"
+    DELETING = "deleting"  # Hidden from users while the worker purges its rows
 
 
 class MessageStatus(str, enum.Enum):
@@ -35,6 +39,7 @@ class MessageStatus(str, enum.Enum):
     SENDING = "sending"
     SENT = "sent"
     DELIVERED = "delivered"
+    READ = "read"
     FAILED = "failed"
 
 
@@ -56,6 +61,9 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True))
     
+    # Keyset pagination of the admin user list
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
+    
     licenses = relationship("License", back_populates="owner", foreign_keys="License.owner_id")
     campaigns = relationship("Campaign", back_populates="user")
     payments = relationship("Payment", back_populates="user")
@@ -93,7 +101,23 @@ class License(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     last_validated = Column(DateTime(timezone=True))
     reseller_id = Column(Integer, ForeignKey("resellers.id"))
-    meta_data = Column(JSON, default={})
+    meta_data = Column(JSONDocument, default={})
+    
+    __table_args__ = (
+        # The expiry sweeper scans ACTIVE licenses by expires_at
+        Index("ix_licenses_status_expires_at", "status", "expires_at"),
+        # Keyset pagination of admin lists
+        Index("ix_licenses_issued_at_id", "issued_at", "id"),
+        # Admin search: key prefixes on the btree, substrings on trigrams (PostgreSQL)
+        Index("ix_licenses_human_key_prefix", "human_key", postgresql_ops={"human_key": "varchar_pattern_ops"}),
+        Index("ix_licenses_owner_email_trgm", "owner_email",
+              postgresql_using="gin", postgresql_ops={"owner_email": "gin_trgm_ops"}),
+        Index("ix_licenses_human_key_trgm", "human_key",
+              postgresql_using="gin", postgresql_ops={"human_key": "gin_trgm_ops"}),
+        # Containment (@>) lookups on metadata
+        Index("ix_licenses_meta_data_gin", "meta_data",
+              postgresql_using="gin", postgresql_ops={"meta_data": "jsonb_path_ops"}),
+    )
     
     owner = relationship("User", back_populates="licenses", foreign_keys=[owner_id])
     reseller = relationship("Reseller", back_populates="licenses", foreign_keys=[reseller_id])
@@ -101,6 +125,14 @@ class License(Base):
     campaigns = relationship("Campaign", back_populates="license")
 
 
+# The trigram indexes above need pg_trgm when tables are created without migrations
+event.listen(
+    License.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
 class Device(Base):
     __tablename__ = "devices"
     
@@ -111,6 +143,9 @@ class Device(Base):
     activated_at = Column(DateTime(timezone=True), server_default=func.now())
     last_seen = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Activation / validation look devices up by license and hwid
+    __table_args__ = (Index("ix_devices_license_id_hwid", "license_id", "hwid"),)
+    
     license = relationship("License", back_populates="devices")
 
 
@@ -129,6 +164,9 @@ class Campaign(Base):
     completed_at = Column(DateTime(timezone=True))
     settings = Column(JSON, default={})
     
+    # Per-user campaign lists, newest first
+    __table_args__ = (Index("ix_campaigns_user_id_created_at", "user_id", "created_at"),)
+    
     user = relationship("User", back_populates="campaigns")
     license = relationship("License", back_populates="campaigns")
     contacts = relationship("Contact", back_populates="campaign")
@@ -142,15 +180,25 @@ class Contact(Base):
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
     name = Column(String(255))
     phone = Column(String(50), nullable=False)
-    custom = Column(JSON, default={})
+    custom = Column(JSONDocument, default={})
     status = Column(SQLEnum(MessageStatus), default=MessageStatus.QUEUED, nullable=False)
+    provider_message_id = Column(String(128), unique=True, index=True)  # WhatsApp message id (wamid)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Campaign stats count contacts per status without touching the table
+        Index("ix_contacts_campaign_id_status", "campaign_id", "status"),
+        # Segment filters on custom attributes (PostgreSQL)
+        Index("ix_contacts_custom_gin", "custom",
+              postgresql_using="gin", postgresql_ops={"custom": "jsonb_path_ops"}),
+    )
+    
     campaign = relationship("Campaign", back_populates="contacts")
     logs = relationship("Log", back_populates="contact")
 
 
 class Log(Base):
+    # Range-partitioned by month on timestamp in PostgreSQL (migration 0002)
     __tablename__ = "logs"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -160,10 +208,72 @@ class Log(Base):
     detail = Column(Text)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
+    # A contact's log history, newest first
+    __table_args__ = (Index("ix_logs_contact_id_timestamp", "contact_id", "timestamp"),)
+    
     campaign = relationship("Campaign", back_populates="logs")
     contact = relationship("Contact", back_populates="logs")
 
 
+class LogRollupHourly(Base):
+    """Per-campaign hourly counts of logs / campaign_logs rows, kept after raw partitions expire"""
+    __tablename__ = "log_rollups_hourly"
+    
+    source = Column(String(20), primary_key=True)  # "logs" or "campaign_logs"
+    campaign_id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    kind = Column(String(50), primary_key=True)  # status for logs, log_type for campaign_logs
+    count = Column(Integer, nullable=False, default=0)
+
+
+class LogRollupDaily(Base):
+    """Per-campaign daily counts, aggregated from log_rollups_hourly"""
+    __tablename__ = "log_rollups_daily"
+    
+    source = Column(String(20), primary_key=True)
+    campaign_id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    kind = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RevenueDaily(Base):
+    """Completed payments per day, currency, provider and plan"""
+    __tablename__ = "revenue_daily"
+    
+    day = Column(Date, primary_key=True)  # Day the payment completed (UTC)
+    currency = Column(String(3), primary_key=True)
+    provider = Column(String(50), primary_key=True)
+    plan = Column(String(50), primary_key=True)  # "" when the payment has no plan
+    amount = Column(Numeric(14, 2), nullable=False, default=0)
+    payments = Column(Integer, nullable=False, default=0)
+
+
+class LicenseDaily(Base):
+    """Licenses issued, devices activated and licenses expired per day and plan"""
+    __tablename__ = "license_daily"
+    
+    day = Column(Date, primary_key=True)
+    plan = Column(String(50), primary_key=True)
+    issued = Column(Integer, nullable=False, default=0)
+    activated = Column(Integer, nullable=False, default=0)
+    expired = Column(Integer, nullable=False, default=0)
+
+
+class MessageIndex(Base):
+    """Maps a WhatsApp message id to who sent it and its last known delivery state"""
+    __tablename__ = "message_index"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(String(128), unique=True, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    campaign_id = Column(Integer, index=True)
+    contact_id = Column(Integer)
+    status = Column(String(20), default="sent", nullable=False)
+    status_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Payment(Base):
     __tablename__ = "payments"
     
@@ -179,4 +289,7 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
     
+    # Per-user payment history, newest first
+    __table_args__ = (Index("ix_payments_user_id_created_at", "user_id", "created_at"),)
+    
     user = relationship("User", back_populates="payments")
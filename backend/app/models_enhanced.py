@@ -1,8 +1,9 @@
 """Enhanced models for Template and Campaign system with 90+ features"""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models import JSONDocument
 
 
 class Template(Base):
@@ -29,7 +30,7 @@ class Template(Base):
     # Relationships
     author = relationship("User", foreign_keys=[author_id])
     versions = relationship("TemplateVersion", back_populates="template", cascade="all, delete-orphan")
-    campaigns = relationship("Campaign", back_populates="template")
+    campaigns = relationship("CampaignEnhanced", back_populates="template")
 
 
 class TemplateVersion(Base):
@@ -103,22 +104,31 @@ class CampaignContact(Base):
     campaign_id = Column(Integer, ForeignKey("campaigns_enhanced.id"), nullable=False)
     name = Column(String(255))
     phone = Column(String(50), nullable=False)
-    variables = Column(JSON, default={})  # Personalized variables
+    variables = Column(JSONDocument, default={})  # Personalized variables
     status = Column(String(50), default="pending", index=True)
     personalized_message = Column(Text)  # Message with variables replaced
+    provider_message_id = Column(String(128), unique=True, index=True)  # WhatsApp message id (wamid)
     sent_at = Column(DateTime(timezone=True))
     delivered_at = Column(DateTime(timezone=True))
+    read_at = Column(DateTime(timezone=True))
     failed_at = Column(DateTime(timezone=True))
+    error_code = Column(String(50))
     error_message = Column(Text)
     retry_count = Column(Integer, default=0)
     
+    # Segment filters on personalised variables (PostgreSQL)
+    __table_args__ = (
+        Index("ix_campaign_contacts_variables_gin", "variables",
+              postgresql_using="gin", postgresql_ops={"variables": "jsonb_path_ops"}),
+    )
+    
     # Relationships
     campaign = relationship("CampaignEnhanced", back_populates="contacts")
     logs = relationship("CampaignLog", back_populates="contact")
 
 
 class CampaignLog(Base):
-    """Real-time campaign logs"""
+    """Real-time campaign logs (range-partitioned by month in PostgreSQL)"""
     __tablename__ = "campaign_logs"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -127,13 +137,37 @@ class CampaignLog(Base):
     log_type = Column(String(50), nullable=False)  # info, success, error, warning
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    metadata = Column(JSON, default={})
+    meta_data = Column("metadata", JSON, default={})
     
     # Relationships
     campaign = relationship("CampaignEnhanced", back_populates="logs")
     contact = relationship("CampaignContact", back_populates="logs")
 
 
+class CampaignDeliveryStats(Base):
+    """Hourly delivery funnel and send-to-delivery latency histogram per campaign"""
+    __tablename__ = "campaign_delivery_stats_hourly"
+    
+    campaign_id = Column(Integer, ForeignKey("campaigns_enhanced.id"), primary_key=True)
+    hour = Column(DateTime(timezone=True), primary_key=True)  # Hour the messages were sent (or failed)
+    sent = Column(Integer, default=0, nullable=False)
+    delivered = Column(Integer, default=0, nullable=False)
+    read = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    latency_sum_seconds = Column(Float, default=0, nullable=False)
+    latency_histogram = Column(JSON, default=[])  # Counts per LATENCY_BUCKETS bound, last entry is overflow
+
+
+class CampaignErrorStats(Base):
+    """Hourly failure counts per campaign and WhatsApp error code"""
+    __tablename__ = "campaign_error_stats_hourly"
+    
+    campaign_id = Column(Integer, ForeignKey("campaigns_enhanced.id"), primary_key=True)
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    error_code = Column(String(50), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+
 class FileAttachment(Base):
     """File attachments for templates"""
     __tablename__ = "file_attachments"
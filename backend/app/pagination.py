@@ -0,0 +1,95 @@
+"""
+Keyset pagination and cheap totals for list endpoints
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal, text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.cache import TTLCache
+from app.config import settings
+
+TOTAL_MODES = ("none", "estimate", "exact")
+
+_count_cache = TTLCache(ttl=settings.LIST_COUNT_CACHE_SECONDS, max_size=1000)
+
+
+def encode_cursor(sort_value: datetime, row_id) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, object]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), row_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query: Query, sort_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    Rows after the cursor in (sort_column, id_column) descending order, plus
+    the cursor for the next page. Served by a composite index on both columns,
+    so every page costs the same regardless of depth.
+    """
+    sort_key = sort_column
+    if query.session.get_bind().dialect.name == "sqlite":
+        # SQLite stores datetimes as text, CURRENT_TIMESTAMP without fractional
+        # seconds and bound values with them, so compare as julian days instead
+        sort_key = func.julianday(sort_column)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        bound = literal(sort_value, sort_column.type)
+        if sort_key is not sort_column:
+            bound = func.julianday(bound)
+        query = query.filter(tuple_(sort_key, id_column) < tuple_(bound, literal(row_id, id_column.type)))
+    rows = query.order_by(sort_key.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def estimated_total(db: Session, table_name: str) -> Optional[int]:
+    """Planner row estimate from pg_class (PostgreSQL only; None before the first ANALYZE)"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+def list_total(db: Session, query: Query, mode: str, table_name: str, cache_key: str, filtered: bool) -> Dict:
+    """
+    Total for a list response. "estimate" uses pg_class for unfiltered lists
+    and a briefly cached exact count otherwise; "none" skips counting.
+    """
+    if mode not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail=f"total must be one of {', '.join(TOTAL_MODES)}")
+    if mode == "none":
+        return {"total": None, "total_is_estimate": False}
+    if mode == "estimate":
+        if not filtered:
+            estimate = estimated_total(db, table_name)
+            if estimate is not None:
+                return {"total": estimate, "total_is_estimate": True}
+        cached = _count_cache.get(cache_key)
+        if cached is not None:
+            return {"total": cached, "total_is_estimate": True}
+
+    total = query.order_by(None).count()
+    _count_cache.set(cache_key, total)
+    return {"total": total, "total_is_estimate": False}
@@ -0,0 +1,133 @@
+"""
+Rate Limiting Middleware
+GCRA limits per route bucket and principal, evaluated atomically in Redis.
+Denials are remembered in-process until their retry time so repeat offenders
+are rejected without a Redis round trip. Requests pass if Redis is down.
+"""
+import logging
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+import redis
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket key; ARGV[1] = emission interval (ms), ARGV[2] = period (ms)
+# Stores the theoretical arrival time; returns {allowed, retry_after_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
+
+PERIOD_MS = 60000
+
+
+def request_principal(scope) -> str:
+    """The authenticated user when a valid bearer token is present, otherwise the client address"""
+    authorization = Headers(scope=scope).get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(
+                authorization[7:], settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+            )
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RATE_LIMIT_PER_MINUTE and RATE_LIMIT_ROUTES overrides"""
+
+    def __init__(self, app, redis_retry_seconds: float = 30.0, max_local_denials: int = 10000):
+        self.app = app
+        self.routes = settings.rate_limit_routes
+        self.exempt = set(settings.rate_limit_exempt_paths)
+        self.script = redis_client.register_script(GCRA_SCRIPT)
+        self.redis_retry_seconds = redis_retry_seconds
+        self.max_local_denials = max_local_denials
+        self._denied_until: Dict[str, float] = {}
+        self._redis_down_until = 0.0
+
+    def _bucket(self, path: str) -> Tuple[str, int]:
+        """Route override bucket for the path, otherwise the shared default bucket"""
+        limit = self.routes.get(path)
+        if limit is not None:
+            return path, limit
+        return "default", settings.RATE_LIMIT_PER_MINUTE
+
+    async def _check(self, key: str, limit: int) -> Optional[float]:
+        """Seconds until the next request is allowed, or None if this one may proceed"""
+        now = time.monotonic()
+        denied_until = self._denied_until.get(key)
+        if denied_until is not None:
+            if denied_until > now:
+                return denied_until - now
+            del self._denied_until[key]
+
+        if now < self._redis_down_until:
+            return None
+        try:
+            # Off the event loop so a slow Redis only delays this request
+            allowed, retry_ms = await run_in_threadpool(self.script, keys=[key], args=[PERIOD_MS / limit, PERIOD_MS])
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, allowing requests: {str(e)}")
+            self._redis_down_until = now + self.redis_retry_seconds
+            return None
+
+        if allowed:
+            return None
+        retry_after = int(retry_ms) / 1000
+        if len(self._denied_until) >= self.max_local_denials:
+            self._denied_until.clear()
+        self._denied_until[key] = now + retry_after
+        return retry_after
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.RATE_LIMIT_ENABLED
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in self.exempt
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        bucket, limit = self._bucket(scope["path"])
+        retry_after = None
+        if limit > 0:
+            retry_after = await self._check(f"ratelimit:{bucket}:{request_principal(scope)}", limit)
+
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
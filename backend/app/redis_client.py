@@ -0,0 +1,9 @@
+import redis
+from app.config import settings
+
+# Shared connection pool; connections are opened lazily on first command
+redis_client = redis.Redis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+)
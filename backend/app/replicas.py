@@ -0,0 +1,196 @@
+"""
+Read Replica Routing
+Read-only endpoints take their session from get_read_db / get_async_read_db,
+which pick a replica whose replication lag is within REPLICA_MAX_LAG_SECONDS
+and fall back to the primary. A client that just wrote is pinned to the
+primary for READ_YOUR_WRITES_SECONDS so it always reads its own writes.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import TTLCache
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, async_url, pool_options
+from app.rate_limit import request_principal
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; 0 when the replica has replayed everything it received
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Principal -> pinned to the primary; shared through Redis across API processes
+_primary_pins = TTLCache(ttl=settings.READ_YOUR_WRITES_SECONDS, max_size=100000, redis_prefix="dbpin:")
+
+
+# Errors that mean "replica unreachable"; asyncpg can raise raw socket errors
+_PROBE_ERRORS = (SQLAlchemyError, OSError, asyncio.TimeoutError)
+
+
+def _connect_args(url: str, for_async: bool = False) -> Dict:
+    """Short connect timeout so a dead replica fails fast instead of stalling requests"""
+    if not url.startswith("postgresql"):
+        return {}
+    if for_async:
+        return {"timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS}
+    return {"connect_timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS}
+
+
+class Replica:
+    """One replica with sync and async engines and its last measured lag"""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(
+            url, pool_pre_ping=True, connect_args=_connect_args(url), **pool_options(url)
+        )
+        self.async_engine = create_async_engine(
+            async_url(url),
+            pool_pre_ping=True,
+            connect_args=_connect_args(url, for_async=True),
+            **pool_options(url, for_async=True)
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self.checked_at >= settings.REPLICA_LAG_CHECK_SECONDS
+
+    def usable(self) -> bool:
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+    def _record(self, lag: Optional[float]) -> None:
+        if lag is not None and lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning(f"Replica {self.name} is {lag:.1f}s behind, reading from the primary")
+        self.lag = lag
+        self.checked_at = time.monotonic()
+
+    def _failed(self, e: Exception) -> None:
+        logger.warning(f"Replica {self.name} unavailable: {str(e)}")
+        self._record(None)
+
+    def _start_check(self) -> None:
+        # Claim the interval up front so concurrent requests don't each probe a dead host
+        self.checked_at = time.monotonic()
+
+    def check(self) -> None:
+        self._start_check()
+        if self.engine.dialect.name != "postgresql":
+            self._record(0.0)
+            return
+        try:
+            with self.engine.connect() as conn:
+                self._record(float(conn.execute(text(LAG_SQL)).scalar()))
+        except _PROBE_ERRORS as e:
+            self._failed(e)
+
+    async def _probe_async(self) -> float:
+        async with self.async_engine.connect() as conn:
+            return float((await conn.execute(text(LAG_SQL))).scalar())
+
+    async def check_async(self) -> None:
+        self._start_check()
+        if self.async_engine.dialect.name != "postgresql":
+            self._record(0.0)
+            return
+        try:
+            self._record(await asyncio.wait_for(self._probe_async(), settings.REPLICA_CONNECT_TIMEOUT_SECONDS))
+        except _PROBE_ERRORS as e:
+            self._failed(e)
+
+
+class ReplicaSet:
+    """Round-robin over replicas that are within the lag limit"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+
+    def _rotation(self) -> List[Replica]:
+        start = next(self._next) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def pick(self) -> Optional[Replica]:
+        for replica in self._rotation():
+            if replica.needs_check():
+                replica.check()
+            if replica.usable():
+                return replica
+        return None
+
+    async def pick_async(self) -> Optional[Replica]:
+        for replica in self._rotation():
+            if replica.needs_check():
+                await replica.check_async()
+            if replica.usable():
+                return replica
+        return None
+
+
+replica_set = ReplicaSet(settings.database_replica_urls)
+
+
+def _pinned(request: Request) -> bool:
+    return _primary_pins.get(request_principal(request.scope)) is not None
+
+
+def get_read_db(request: Request) -> Iterator[Session]:
+    """Session for read-only endpoints: a healthy replica unless the client just wrote"""
+    replica = None
+    if replica_set.replicas and not _pinned(request):
+        replica = replica_set.pick()
+    # Lets the response cache refuse to fill from a lagging copy
+    request.state.read_replica = replica.name if replica else None
+    db = replica.SessionLocal() if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """AsyncSession counterpart of get_read_db"""
+    replica = None
+    if replica_set.replicas and not await run_in_threadpool(_pinned, request):
+        replica = await replica_set.pick_async()
+    request.state.read_replica = replica.name if replica else None
+    async with (replica.AsyncSessionLocal() if replica else AsyncSessionLocal()) as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary after a write request succeeds (only when replicas are configured)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _WRITE_METHODS or not replica_set.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Pin before the client can see the response and issue its next read
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await run_in_threadpool(_primary_pins.set, request_principal(scope), True)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,139 @@
+"""
+Response Cache
+Serialised JSON responses of read endpoints kept in Redis, one hash per
+invalidation scope (e.g. "campaigns:42") with a field per user and URL.
+Responses carry a strong ETag so polling clients get 304s, and the write
+endpoints that change the data drop the whole scope.
+
+Entries are only filled from primary reads: a replica can lag behind the
+write that just invalidated the scope. Each scope also has a generation
+counter that invalidate() bumps; a fill only lands if the generation is
+still the one seen before the database read, so a slow read can't write
+a pre-commit body back after the invalidation.
+"""
+import hashlib
+import logging
+import time
+from typing import Any, Optional
+
+import redis
+from fastapi import Request, Response
+
+from app.config import settings
+from app.fast_json import dumps
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "respcache:"
+GENERATION_PREFIX = "respcache:gen:"
+CACHE_CONTROL = "private, no-cache"
+
+# Generations only need to outlive the slowest read between lookup and fill
+GENERATION_TTL_SECONDS = 86400
+
+# KEYS: entries hash, generation; ARGV: generation seen at lookup ("" if none), field, value, ttl
+_FILL_SCRIPT = redis_client.register_script("""
+local current = redis.call('GET', KEYS[2]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+""")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    candidates = request.headers.get("if-none-match", "")
+    return candidates.strip() == "*" or etag in [c.strip() for c in candidates.split(",")]
+
+
+def _response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """After a Redis error the cache is bypassed for `redis_retry_seconds`"""
+
+    def __init__(self, ttl: int, redis_retry_seconds: float = 30.0):
+        self.ttl = ttl
+        self.redis_retry_seconds = redis_retry_seconds
+        self._redis_down_until = 0.0
+
+    def _available(self) -> bool:
+        return settings.RESPONSE_CACHE_ENABLED and time.monotonic() >= self._redis_down_until
+
+    def _failed(self, e: Exception) -> None:
+        logger.warning(f"Response cache unavailable: {str(e)}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+
+    @staticmethod
+    def _field(request: Request, user_id: int) -> str:
+        return f"{user_id}:{request.url.path}?{request.url.query}"
+
+    def lookup(self, request: Request, scope: str, user_id: int) -> Optional[Response]:
+        """
+        The cached response (or a 304) for this user and URL, if there is one.
+        On a miss the scope's generation is remembered on the request for respond().
+        """
+        if not self._available():
+            return None
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hget(KEY_PREFIX + scope, self._field(request, user_id))
+            pipe.get(GENERATION_PREFIX + scope)
+            cached, generation = pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+            return None
+        if cached is None:
+            request.state.response_cache_generation = generation or b""
+            return None
+        etag, body = cached.split(b"\n", 1)
+        return _response(request, body, etag.decode())
+
+    def respond(self, request: Request, scope: str, user_id: int, payload: Any) -> Response:
+        """
+        Serialise the payload and answer with its ETag. It is cached under the
+        scope only if it was read from the primary and the scope has not been
+        invalidated since lookup().
+        """
+        body = dumps(payload)
+        etag = _etag(body)
+        generation = getattr(request.state, "response_cache_generation", None)
+        from_replica = getattr(request.state, "read_replica", None) is not None
+        if generation is not None and not from_replica and self._available():
+            try:
+                _FILL_SCRIPT(
+                    keys=[KEY_PREFIX + scope, GENERATION_PREFIX + scope],
+                    args=[generation, self._field(request, user_id), etag.encode() + b"\n" + body, self.ttl]
+                )
+            except redis.RedisError as e:
+                self._failed(e)
+        return _response(request, body, etag)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Call after committing a change to data served under these scopes"""
+        if not scopes:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for scope in scopes:
+                pipe.incr(GENERATION_PREFIX + scope)
+                pipe.expire(GENERATION_PREFIX + scope, GENERATION_TTL_SECONDS)
+            pipe.delete(*[KEY_PREFIX + scope for scope in scopes])
+            pipe.execute()
+        except redis.RedisError as e:
+            # Entries that survive expire after ttl
+            self._failed(e)
+
+
+response_cache = ResponseCache(ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from app.database import get_db
-from app.models import User, License, Payment, Campaign, Reseller, UserRole, LicenseStatus, PaymentStatus
-from app.auth import get_current_admin, get_password_hash
+from app.models import User, Reseller, UserRole
+from app.auth import get_current_admin, hash_password, invalidate_user_cache
+from app.fast_json import FastJSONResponse
+from app.pagination import keyset_page, list_total
+from app.replicas import get_read_db
+from app.response_cache import response_cache
+from app.services import admin_stats, daily_rollups, license_search
 
 router = APIRouter()
 
@@ -21,99 +25,76 @@ class CreateResellerRequest(BaseModel):
 
 @router.get("/stats")
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get admin dashboard statistics"""
-    
-    # User stats
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
+    """Get admin dashboard statistics from the incrementally maintained counters"""
     
-    # License stats
-    total_licenses = db.query(License).count()
-    active_licenses = db.query(License).filter(License.status == LicenseStatus.ACTIVE).count()
-    expired_licenses = db.query(License).filter(License.status == LicenseStatus.EXPIRED).count()
-    
-    # Revenue stats
-    total_revenue = db.query(func.sum(Payment.amount)).filter(
-        Payment.status == PaymentStatus.COMPLETED
-    ).scalar() or 0
+    return admin_stats.snapshot(db)
+
+
+def _series_range(start: Optional[date], end: Optional[date]):
+    """Default to the last 30 days"""
+    end = end or datetime.utcnow().date()
+    return start or end - timedelta(days=30), end
+
+
+@router.get("/analytics/revenue")
+async def revenue_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: str = "day",
+    currency: Optional[str] = None,
+    provider: Optional[str] = None,
+    plan: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Completed revenue per day, week or month and currency, from the daily rollups"""
     
-    monthly_revenue = db.query(func.sum(Payment.amount)).filter(
-        Payment.status == PaymentStatus.COMPLETED,
-        Payment.created_at >= datetime.utcnow() - timedelta(days=30)
-    ).scalar() or 0
+    start, end = _series_range(start, end)
+    try:
+        series = daily_rollups.revenue_series(db, start, end, interval, currency, provider, plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Campaign stats
-    total_campaigns = db.query(Campaign).count()
+    return {"start": start.isoformat(), "end": end.isoformat(), "interval": interval, "series": series}
+
+
+@router.get("/analytics/licenses")
+async def license_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: str = "day",
+    plan: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Licenses issued, devices activated and licenses expired per day, week or month"""
     
-    # Recent activations (last 7 days)
-    recent_activations = db.query(License).filter(
-        License.issued_at >= datetime.utcnow() - timedelta(days=7)
-    ).count()
+    start, end = _series_range(start, end)
+    try:
+        series = daily_rollups.license_series(db, start, end, interval, plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "users": {
-            "total": total_users,
-            "active": active_users
-        },
-        "licenses": {
-            "total": total_licenses,
-            "active": active_licenses,
-            "expired": expired_licenses,
-            "recent_activations": recent_activations
-        },
-        "revenue": {
-            "total": float(total_revenue),
-            "monthly": float(monthly_revenue)
-        },
-        "campaigns": {
-            "total": total_campaigns
-        }
-    }
+    return {"start": start.isoformat(), "end": end.isoformat(), "interval": interval, "series": series}
 
 
 @router.get("/licenses")
 async def list_licenses(
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
     status: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    total: str = "estimate",
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """List all licenses with filters"""
-    
-    query = db.query(License)
+    """List all licenses with filters; pass next_cursor back as cursor for the next page"""
     
-    if status:
-        query = query.filter(License.status == LicenseStatus(status))
-    
-    if search:
-        query = query.filter(
-            (License.owner_email.ilike(f"%{search}%")) |
-            (License.human_key.ilike(f"%{search}%"))
-        )
-    
-    total = query.count()
-    licenses = query.order_by(License.issued_at.desc()).offset(skip).limit(limit).all()
-    
-    return {
-        "total": total,
-        "licenses": [
-            {
-                "id": str(lic.id),
-                "human_key": lic.human_key,
-                "owner_email": lic.owner_email,
-                "plan": lic.plan,
-                "status": lic.status.value,
-                "issued_at": lic.issued_at.isoformat(),
-                "expires_at": lic.expires_at.isoformat(),
-                "max_devices": lic.max_devices
-            } for lic in licenses
-        ]
-    }
+    return FastJSONResponse(license_search.search_licenses(db, search, status, cursor, skip, limit, total))
 
 
 @router.post("/resellers")
@@ -132,7 +113,7 @@ async def create_reseller(
     # Create user
     user = User(
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=await hash_password(request.password),
         role=UserRole.RESELLER
     )
     db.add(user)
@@ -148,6 +129,8 @@ async def create_reseller(
     db.add(reseller)
     db.commit()
     db.refresh(reseller)
+    admin_stats.users_added()
+    response_cache.invalidate("resellers")
     
     return {
         "id": reseller.id,
@@ -161,14 +144,19 @@ async def create_reseller(
 
 @router.get("/resellers")
 async def list_resellers(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
     """List all resellers"""
     
+    cached = response_cache.lookup(request, "resellers", current_user.id)
+    if cached is not None:
+        return cached
+    
     resellers = db.query(Reseller).join(User).all()
     
-    return {
+    return response_cache.respond(request, "resellers", current_user.id, {
         "resellers": [
             {
                 "id": r.id,
@@ -180,23 +168,30 @@ async def list_resellers(
                 "created_at": r.created_at.isoformat()
             } for r in resellers
         ]
-    }
+    })
 
 
 @router.get("/users")
 async def list_users(
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    total: str = "estimate",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """List all users"""
+    """List all users; pass next_cursor back as cursor for the next page"""
+    
+    query = db.query(User)
+    totals = list_total(db, query, total, "users", "users", filtered=False)
     
-    total = db.query(User).count()
-    users = db.query(User).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    if skip and not cursor:
+        query = query.offset(skip)
+    users, next_cursor = keyset_page(query, User.created_at, User.id, cursor, limit)
     
     return {
-        "total": total,
+        **totals,
+        "next_cursor": next_cursor,
         "users": [
             {
                 "id": u.id,
@@ -224,6 +219,8 @@ async def toggle_user_active(
     
     user.is_active = not user.is_active
     db.commit()
+    invalidate_user_cache(user.email)
+    admin_stats.user_active_changed(user.is_active)
     
     return {
         "id": user.id,
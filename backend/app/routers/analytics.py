@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import User
+from app.models_enhanced import CampaignEnhanced
+from app.auth import get_current_user
+from app.services import delivery_analytics
+
+router = APIRouter()
+
+
+@router.get("/campaigns/{campaign_id}/delivery")
+async def campaign_delivery_analytics(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delivery funnel, latency histogram and error breakdown from the hourly rollups"""
+    
+    campaign = db.query(CampaignEnhanced).filter(
+        CampaignEnhanced.id == campaign_id,
+        CampaignEnhanced.user_id == current_user.id
+    ).first()
+    
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return {
+        "campaign_id": campaign.id,
+        "name": campaign.name,
+        **delivery_analytics.campaign_summary(db, campaign.id)
+    }
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
 from app.auth import (
-    verify_password, get_password_hash, create_access_token,
-    create_refresh_token, decode_token, get_current_user
+    hash_password, verify_and_update_password, create_access_token,
+    create_refresh_token, decode_token, get_current_user, invalidate_user_cache
 )
+from app.services import admin_stats
 from datetime import datetime
 
 router = APIRouter()
@@ -33,21 +35,22 @@ class RefreshRequest(BaseModel):
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
+    existing_user = (await db.execute(select(User).where(User.email == request.email))).scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create user
     user = User(
         email=request.email,
-        password_hash=get_password_hash(request.password)
+        password_hash=await hash_password(request.password)
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    invalidate_user_cache(user.email)
+    admin_stats.users_added()
     
     # Generate tokens
     access_token = create_access_token(data={"sub": user.email})
@@ -60,10 +63,13 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    user = (await db.execute(select(User).where(User.email == request.email))).scalar_one_or_none()
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await verify_and_update_password(request.password, user.password_hash)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -72,9 +78,14 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account is inactive")
     
+    # Upgrade hashes made with an older scheme or cost
+    if new_hash:
+        user.password_hash = new_hash
+    
     # Update last login
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    invalidate_user_cache(user.email)
     
     # Generate tokens
     access_token = create_access_token(data={"sub": user.email})
@@ -87,7 +98,7 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
     """Refresh access token"""
     payload = decode_token(request.refresh_token)
     
@@ -95,7 +106,7 @@ async def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=401, detail="Invalid token type")
     
     email = payload.get("sub")
-    user = db.query(User).filter(User.email == email).first()
+    user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="Invalid token")
     
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 import csv
 import io
+from collections import defaultdict
 from app.database import get_db
 from app.models import User, Campaign, Contact, Log, CampaignStatus, MessageStatus
 from app.auth import get_current_user
+from app.fast_json import FastJSONResponse, records
+from app.replicas import get_async_read_db, get_read_db
+from app.response_cache import response_cache
+from app.services import admin_stats, contact_segments
 
 router = APIRouter()
 
@@ -27,16 +34,24 @@ class ContactData(BaseModel):
 
 @router.get("")
 async def list_campaigns(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all campaigns for current user"""
     
+    scope = f"campaigns:{current_user.id}"
+    # Misses read the primary so a lagging replica is never cached; hits are the offload
+    cached = response_cache.lookup(request, scope, current_user.id)
+    if cached is not None:
+        return cached
+    
     campaigns = db.query(Campaign).filter(
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).order_by(Campaign.created_at.desc()).all()
     
-    return [
+    return response_cache.respond(request, scope, current_user.id, [
         {
             "id": campaign.id,
             "name": campaign.name,
@@ -48,7 +63,7 @@ async def list_campaigns(
             "completed_at": campaign.completed_at.isoformat() if campaign.completed_at else None,
             "settings": campaign.settings
         } for campaign in campaigns
-    ]
+    ])
 
 
 @router.post("")
@@ -71,6 +86,8 @@ async def create_campaign(
     db.add(campaign)
     db.commit()
     db.refresh(campaign)
+    admin_stats.campaigns_changed(1)
+    response_cache.invalidate(f"campaigns:{current_user.id}")
     
     return {
         "id": campaign.id,
@@ -93,7 +110,8 @@ async def add_contacts(
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
@@ -125,7 +143,8 @@ async def import_csv(
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
@@ -158,33 +177,30 @@ async def import_csv(
 @router.get("/{campaign_id}/status")
 async def get_campaign_status(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get campaign status and statistics"""
     
-    campaign = db.query(Campaign).filter(
+    campaign = (await db.execute(select(Campaign).where(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
-    ).first()
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
+    ))).scalars().first()
     
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    # Get contact statistics
-    total = db.query(Contact).filter(Contact.campaign_id == campaign.id).count()
-    queued = db.query(Contact).filter(
-        Contact.campaign_id == campaign.id,
-        Contact.status == MessageStatus.QUEUED
-    ).count()
-    sent = db.query(Contact).filter(
-        Contact.campaign_id == campaign.id,
-        Contact.status == MessageStatus.SENT
-    ).count()
-    failed = db.query(Contact).filter(
-        Contact.campaign_id == campaign.id,
-        Contact.status == MessageStatus.FAILED
-    ).count()
+    # Contact statistics in one pass over the (campaign_id, status) index
+    counts = dict((await db.execute(
+        select(Contact.status, func.count())
+        .where(Contact.campaign_id == campaign.id)
+        .group_by(Contact.status)
+    )).all())
+    total = sum(counts.values())
+    queued = counts.get(MessageStatus.QUEUED, 0)
+    sent = counts.get(MessageStatus.SENT, 0)
+    failed = counts.get(MessageStatus.FAILED, 0)
     
     return {
         "id": campaign.id,
@@ -206,47 +222,51 @@ async def get_campaign_status(
 @router.get("/{campaign_id}/report")
 async def get_campaign_report(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get detailed campaign report"""
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    contacts = db.query(Contact).filter(Contact.campaign_id == campaign.id).all()
-    
-    report = []
-    for contact in contacts:
-        logs = db.query(Log).filter(Log.contact_id == contact.id).order_by(Log.timestamp.desc()).all()
-        
-        report.append({
-            "name": contact.name,
-            "phone": contact.phone,
-            "status": contact.status.value,
-            "custom": contact.custom,
-            "logs": [
-                {
-                    "status": log.status.value,
-                    "detail": log.detail,
-                    "timestamp": log.timestamp.isoformat()
-                } for log in logs
-            ]
-        })
-    
-    return {
+    contacts = db.execute(
+        select(Contact.id, Contact.name, Contact.phone, Contact.status, Contact.custom)
+        .where(Contact.campaign_id == campaign.id)
+    ).all()
+    
+    # Every log of the campaign in one pass over (contact_id, timestamp), newest first per contact
+    logs = defaultdict(list)
+    for contact_id, status, detail, timestamp in db.execute(
+        select(Log.contact_id, Log.status, Log.detail, Log.timestamp)
+        .join(Contact, Contact.id == Log.contact_id)
+        .where(Contact.campaign_id == campaign.id)
+        .order_by(Log.contact_id, Log.timestamp.desc())
+    ):
+        logs[contact_id].append({"status": status, "detail": detail, "timestamp": timestamp})
+    
+    return FastJSONResponse({
         "campaign": {
             "id": campaign.id,
             "name": campaign.name,
-            "status": campaign.status.value
+            "status": campaign.status
         },
-        "contacts": report
-    }
+        "contacts": [
+            {
+                "name": name,
+                "phone": phone,
+                "status": status,
+                "custom": custom,
+                "logs": logs.get(contact_id, [])
+            } for contact_id, name, phone, status, custom in contacts
+        ]
+    })
 
 
 @router.post("/{campaign_id}/start")
@@ -259,7 +279,8 @@ async def start_campaign(
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
@@ -271,6 +292,7 @@ async def start_campaign(
     campaign.status = CampaignStatus.RUNNING
     campaign.started_at = datetime.utcnow()
     db.commit()
+    response_cache.invalidate(f"campaigns:{current_user.id}")
     
     # TODO: Queue campaign for sending worker
     
@@ -287,7 +309,8 @@ async def pause_campaign(
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
@@ -298,6 +321,7 @@ async def pause_campaign(
     
     campaign.status = CampaignStatus.PAUSED
     db.commit()
+    response_cache.invalidate(f"campaigns:{current_user.id}")
     
     return {"success": True, "status": campaign.status.value}
 
@@ -312,48 +336,50 @@ async def delete_campaign(
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    # Delete associated contacts and logs
-    db.query(Contact).filter(Contact.campaign_id == campaign_id).delete()
-    db.query(Log).filter(Log.campaign_id == campaign_id).delete()
-    
-    # Delete campaign
-    db.delete(campaign)
+    # Contacts and logs are purged in small chunks by the background worker
+    campaign.status = CampaignStatus.DELETING
     db.commit()
+    response_cache.invalidate(f"campaigns:{current_user.id}")
     
-    return {"success": True, "message": "Campaign deleted successfully"}
+    return {"success": True, "status": campaign.status.value, "message": "Campaign scheduled for deletion"}
 
 
 @router.get("/{campaign_id}/contacts")
 async def get_campaign_contacts(
     campaign_id: int,
+    segment: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all contacts for a campaign"""
+    """
+    Get the contacts of a campaign, optionally only those whose custom fields
+    match a segment such as `city=Mumbai AND tier in (gold, silver)`
+    """
     
     campaign = db.query(Campaign).filter(
         Campaign.id == campaign_id,
-        Campaign.user_id == current_user.id
+        Campaign.user_id == current_user.id,
+        Campaign.status != CampaignStatus.DELETING
     ).first()
     
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    contacts = db.query(Contact).filter(Contact.campaign_id == campaign_id).all()
-    
-    return [
-        {
-            "id": contact.id,
-            "name": contact.name,
-            "phone": contact.phone,
-            "custom": contact.custom,
-            "status": contact.status.value,
-            "created_at": contact.created_at.isoformat()
-        } for contact in contacts
-    ]
+    query = select(
+        Contact.id, Contact.name, Contact.phone, Contact.custom, Contact.status, Contact.created_at
+    ).where(Contact.campaign_id == campaign_id)
+    if segment:
+        try:
+            query = query.where(contact_segments.segment_filter(Contact.custom, segment))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid segment: {str(e)}")
+    result = db.execute(query)
+    
+    return FastJSONResponse(records(list(result.keys()), result))
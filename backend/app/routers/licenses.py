@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
-from datetime import datetime, timedelta
-from jose import jwt
+from datetime import datetime, timedelta, timezone
+import csv
+import io
+import re
 import uuid
 import secrets
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, License, Device, LicenseStatus, Reseller
 from app.auth import get_current_user, get_current_admin, get_current_reseller
+from app.cache import TTLCache
 from app.config import settings
+from app.response_cache import response_cache
+from app.services import admin_stats, daily_rollups, license_heartbeats, license_signing
+from app.services.license_cache import license_cache
 
 router = APIRouter()
 
@@ -22,23 +31,81 @@ class GenerateLicenseRequest(BaseModel):
     reseller_id: Optional[int] = None
 
 
+class GenerateLicenseBatchRequest(BaseModel):
+    owner_email: EmailStr
+    plan: str
+    days: int
+    count: int = Field(ge=1, le=settings.LICENSE_BATCH_MAX)
+    max_devices: int = 1
+    reseller_id: Optional[int] = None
+
+
 class ActivateLicenseRequest(BaseModel):
-    token: str
+    token: Optional[str] = None  # JWT, or a human-readable key pasted in its place
+    license_key: Optional[str] = None
     hwid: str
     device_info: dict = {}
 
 
 class ValidateLicenseRequest(BaseModel):
-    token: str
+    token: Optional[str] = None
+    license_key: Optional[str] = None
     hwid: str
 
 
+# Normalised human key -> license id; the mapping never changes once issued
+license_key_cache = TTLCache(
+    ttl=settings.LICENSE_KEY_CACHE_TTL_SECONDS,
+    max_size=settings.LICENSE_CACHE_MAX_SIZE,
+    redis_prefix="licensekey:"
+)
+
+
 def generate_human_key() -> str:
     """Generate human-readable license key"""
     parts = [secrets.token_hex(2).upper() for _ in range(4)]
     return f"LFT-{'-'.join(parts)}"
 
 
+def normalize_human_key(key: str) -> Optional[str]:
+    """Canonical LFT-XXXX-XXXX-XXXX-XXXX form regardless of case, spaces, dashes or prefix"""
+    compact = re.sub(r"[\s-]", "", key).upper()
+    if compact.startswith("LFT"):
+        compact = compact[3:]
+    if not re.fullmatch(r"[0-9A-F]{16}", compact):
+        return None
+    return "LFT-" + "-".join(compact[i:i + 4] for i in range(0, 16, 4))
+
+
+async def resolve_license_id(db: AsyncSession, token: Optional[str], license_key: Optional[str]) -> str:
+    """License id from a human-readable key (unique index, cached) or from a signed token"""
+    if not license_key and token and "." not in token:
+        license_key = token
+    
+    if not license_key:
+        if not token:
+            raise HTTPException(status_code=400, detail="token or license_key is required")
+        return decode_license_token(token)["license_id"]
+    
+    human_key = normalize_human_key(license_key)
+    if not human_key:
+        raise HTTPException(status_code=401, detail="Invalid license key")
+    
+    license_id = license_key_cache.get(human_key)
+    if license_id is None:
+        license_id = (await db.execute(select(License.id).where(License.human_key == human_key))).scalar()
+        if license_id is None:
+            raise HTTPException(status_code=404, detail="License not found")
+        license_key_cache.set(human_key, license_id)
+    return license_id
+
+
+def license_expired(expires_at: datetime) -> bool:
+    """Compare in UTC whether or not the stored timestamp carries a timezone"""
+    now = datetime.now(timezone.utc) if expires_at.tzinfo else datetime.utcnow()
+    return now > expires_at
+
+
 def create_license_token(license_id: str, owner_email: str, plan: str, expires_at: datetime, max_devices: int) -> str:
     """Create JWT license token"""
     payload = {
@@ -50,13 +117,13 @@ def create_license_token(license_id: str, owner_email: str, plan: str, expires_a
         "max_devices": max_devices,
         "type": "license"
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return license_signing.sign(payload)
 
 
 def decode_license_token(token: str) -> dict:
     """Decode and validate license token"""
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = license_signing.verify(token)
         if payload.get("type") != "license":
             raise ValueError("Invalid token type")
         return payload
@@ -64,80 +131,152 @@ def decode_license_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail=f"Invalid license token: {str(e)}")
 
 
+async def reserve_quota(db: AsyncSession, current_user: User, count: int, reseller_id: Optional[int]) -> Optional[int]:
+    """
+    Charge `count` licenses against the caller's reseller quota in one atomic
+    UPDATE; admins pass through with the requested reseller_id
+    """
+    if current_user.role.value != "reseller":
+        return reseller_id
+    
+    reserved_id = (await db.execute(
+        update(Reseller)
+        .where(Reseller.user_id == current_user.id, Reseller.used_quota + count <= Reseller.quota)
+        .values(used_quota=Reseller.used_quota + count)
+        .returning(Reseller.id)
+    )).scalar()
+    if reserved_id is not None:
+        return reserved_id
+    
+    if (await db.execute(select(Reseller.id).where(Reseller.user_id == current_user.id))).first() is None:
+        raise HTTPException(status_code=403, detail="Reseller profile not found")
+    raise HTTPException(status_code=403, detail="Reseller quota exceeded")
+
+
+def build_license(owner_email: str, plan: str, days: int, max_devices: int, reseller_id: Optional[int]) -> dict:
+    """Column values for a new, signed license"""
+    license_id = str(uuid.uuid4())
+    expires_at = datetime.utcnow() + timedelta(days=days)
+    
+    return {
+        "id": license_id,
+        "token": create_license_token(
+            license_id=license_id,
+            owner_email=owner_email,
+            plan=plan,
+            expires_at=expires_at,
+            max_devices=max_devices
+        ),
+        "human_key": generate_human_key(),
+        "owner_email": owner_email,
+        "plan": plan,
+        "status": LicenseStatus.ACTIVE,
+        "expires_at": expires_at,
+        "max_devices": max_devices,
+        "reseller_id": reseller_id
+    }
+
+
 @router.post("/generate")
 async def generate_license(
     request: GenerateLicenseRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_reseller)
 ):
     """Generate a new license (admin/reseller only)"""
     
-    # Check reseller quota
-    if current_user.role.value == "reseller":
-        reseller = db.query(Reseller).filter(Reseller.user_id == current_user.id).first()
-        if not reseller:
-            raise HTTPException(status_code=403, detail="Reseller profile not found")
-        if reseller.used_quota >= reseller.quota:
-            raise HTTPException(status_code=403, detail="Reseller quota exceeded")
-        reseller.used_quota += 1
-        reseller_id = reseller.id
-    else:
-        reseller_id = request.reseller_id
-    
-    # Create license
-    license_id = uuid.uuid4()
-    expires_at = datetime.utcnow() + timedelta(days=request.days)
+    reseller_id = await reserve_quota(db, current_user, 1, request.reseller_id)
     
-    token = create_license_token(
-        license_id=license_id,
+    license = License(**build_license(
         owner_email=request.owner_email,
         plan=request.plan,
-        expires_at=expires_at,
-        max_devices=request.max_devices
-    )
-    
-    human_key = generate_human_key()
-    
-    license = License(
-        id=license_id,
-        token=token,
-        human_key=human_key,
-        owner_email=request.owner_email,
-        plan=request.plan,
-        status=LicenseStatus.ACTIVE,
-        expires_at=expires_at,
+        days=request.days,
         max_devices=request.max_devices,
         reseller_id=reseller_id
-    )
+    ))
     
     db.add(license)
-    db.commit()
-    db.refresh(license)
+    await db.execute(daily_rollups.license_delta(daily_rollups.utc_day(), request.plan, issued=1))
+    await db.commit()
+    admin_stats.licenses_issued()
+    if current_user.role.value == "reseller":
+        response_cache.invalidate("resellers")
     
     return {
         "license_id": str(license.id),
-        "token": token,
-        "human_key": human_key,
+        "token": license.token,
+        "human_key": license.human_key,
         "owner_email": request.owner_email,
         "plan": request.plan,
-        "expires_at": expires_at.isoformat(),
+        "expires_at": license.expires_at.isoformat(),
         "max_devices": request.max_devices
     }
 
 
+@router.post("/generate-batch")
+async def generate_license_batch(
+    request: GenerateLicenseBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_reseller)
+):
+    """Generate many licenses in one transaction and download them as CSV (admin/reseller only)"""
+    
+    reseller_id = await reserve_quota(db, current_user, request.count, request.reseller_id)
+    
+    # RS256-signing up to LICENSE_BATCH_MAX tokens is CPU-bound; keep it off the event loop
+    licenses = await run_in_threadpool(lambda: [
+        build_license(
+            owner_email=request.owner_email,
+            plan=request.plan,
+            days=request.days,
+            max_devices=request.max_devices,
+            reseller_id=reseller_id
+        ) for _ in range(request.count)
+    ])
+    
+    # Quota charge and inserts commit together
+    await db.execute(insert(License), licenses)
+    await db.execute(daily_rollups.license_delta(daily_rollups.utc_day(), request.plan, issued=request.count))
+    await db.commit()
+    admin_stats.licenses_issued(len(licenses))
+    if current_user.role.value == "reseller":
+        response_cache.invalidate("resellers")
+    
+    def rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["license_id", "human_key", "token", "plan", "expires_at", "max_devices"])
+        for license in licenses:
+            writer.writerow([
+                license["id"],
+                license["human_key"],
+                license["token"],
+                license["plan"],
+                license["expires_at"].isoformat(),
+                license["max_devices"]
+            ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="licenses-{datetime.utcnow():%Y%m%d%H%M%S}.csv"'}
+    )
+
+
 @router.post("/activate")
 async def activate_license(
     request: ActivateLicenseRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Activate license on a device"""
     
-    # Decode token
-    payload = decode_license_token(request.token)
-    license_id = payload["license_id"]
+    license_id = await resolve_license_id(db, request.token, request.license_key)
     
     # Get license from DB
-    license = db.query(License).filter(License.id == license_id).first()
+    license = await db.get(License, license_id)
     if not license:
         raise HTTPException(status_code=404, detail="License not found")
     
@@ -145,24 +284,25 @@ async def activate_license(
     if license.status == LicenseStatus.REVOKED:
         raise HTTPException(status_code=403, detail="License has been revoked")
     
-    if license.status == LicenseStatus.EXPIRED or datetime.utcnow() > license.expires_at:
-        license.status = LicenseStatus.EXPIRED
-        db.commit()
+    # The expiry sweeper flips the status; requests only read it
+    if license.status == LicenseStatus.EXPIRED or license_expired(license.expires_at):
         raise HTTPException(status_code=403, detail="License has expired")
     
     # Check if device already activated
-    existing_device = db.query(Device).filter(
+    existing_device = (await db.execute(select(Device).where(
         Device.license_id == license.id,
         Device.hwid == request.hwid
-    ).first()
+    ))).scalars().first()
     
     if existing_device:
         # Update last seen
         existing_device.last_seen = datetime.utcnow()
-        db.commit()
+        await db.commit()
     else:
         # Check device limit
-        device_count = db.query(Device).filter(Device.license_id == license.id).count()
+        device_count = (await db.execute(
+            select(func.count()).select_from(Device).where(Device.license_id == license.id)
+        )).scalar()
         if device_count >= license.max_devices:
             raise HTTPException(status_code=403, detail="Maximum devices limit reached")
         
@@ -173,6 +313,7 @@ async def activate_license(
             device_info=request.device_info
         )
         db.add(device)
+        await db.execute(daily_rollups.license_delta(daily_rollups.utc_day(), license.plan, activated=1))
         
         # Bind HWID to license if first device
         if not license.hwid:
@@ -180,11 +321,14 @@ async def activate_license(
     
     # Update last validated
     license.last_validated = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    license_cache.invalidate(license.id)
+    response_cache.invalidate(f"license:{license.id}")
     
     return {
         "success": True,
         "license_id": str(license.id),
+        "token": license.token,
         "plan": license.plan,
         "expires_at": license.expires_at.isoformat(),
         "max_devices": license.max_devices,
@@ -195,16 +339,22 @@ async def activate_license(
 @router.post("/validate")
 async def validate_license(
     request: ValidateLicenseRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Validate license (periodic check)"""
     
-    # Decode token
-    payload = decode_license_token(request.token)
-    license_id = payload["license_id"]
+    license_id = await resolve_license_id(db, request.token, request.license_key)
+    
+    # Recently validated devices are answered from memory
+    cached = license_cache.get(license_id, request.hwid)
+    if cached and not license_expired(cached["expires_at"]):
+        await license_heartbeats.record(license_id, cached["device_id"])
+        return cached["response"]
+    
+    generation = license_cache.generation
     
     # Get license
-    license = db.query(License).filter(License.id == license_id).first()
+    license = await db.get(License, license_id)
     if not license:
         raise HTTPException(status_code=404, detail="License not found")
     
@@ -212,47 +362,54 @@ async def validate_license(
     if license.status == LicenseStatus.REVOKED:
         raise HTTPException(status_code=403, detail="License revoked")
     
-    if datetime.utcnow() > license.expires_at:
-        license.status = LicenseStatus.EXPIRED
-        db.commit()
+    if license.status == LicenseStatus.EXPIRED or license_expired(license.expires_at):
         raise HTTPException(status_code=403, detail="License expired")
     
     # Verify device
-    device = db.query(Device).filter(
+    device = (await db.execute(select(Device).where(
         Device.license_id == license.id,
         Device.hwid == request.hwid
-    ).first()
+    ))).scalars().first()
     
     if not device:
         raise HTTPException(status_code=403, detail="Device not activated")
     
-    # Update timestamps
-    device.last_seen = datetime.utcnow()
-    license.last_validated = datetime.utcnow()
-    db.commit()
+    # Timestamps are buffered in Redis and flushed by the worker
+    await license_heartbeats.record(license.id, device.id)
     
-    return {
+    response = {
         "valid": True,
         "status": license.status.value,
         "expires_at": license.expires_at.isoformat(),
         "plan": license.plan
     }
+    license_cache.set(license.id, request.hwid, {
+        "device_id": device.id,
+        "expires_at": license.expires_at,
+        "response": response
+    }, generation)
+    
+    return response
 
 
 @router.post("/revoke/{license_id}")
 async def revoke_license(
     license_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Revoke a license (admin only)"""
     
-    license = db.query(License).filter(License.id == license_id).first()
+    license = await db.get(License, license_id)
     if not license:
         raise HTTPException(status_code=404, detail="License not found")
     
+    previous_status = license.status
     license.status = LicenseStatus.REVOKED
-    db.commit()
+    await db.commit()
+    license_cache.invalidate(license.id)
+    response_cache.invalidate(f"license:{license.id}")
+    admin_stats.license_status_changed(previous_status, LicenseStatus.REVOKED)
     
     return {"success": True, "message": "License revoked"}
 
@@ -261,16 +418,19 @@ async def revoke_license(
 async def extend_license(
     license_id: str,
     days: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Extend license expiry (admin only)"""
     
-    license = db.query(License).filter(License.id == license_id).first()
+    license = await db.get(License, license_id)
     if not license:
         raise HTTPException(status_code=404, detail="License not found")
     
+    previous_status = license.status
     license.expires_at = license.expires_at + timedelta(days=days)
+    if license.status == LicenseStatus.EXPIRED and not license_expired(license.expires_at):
+        license.status = LicenseStatus.ACTIVE
     
     # Regenerate token with new expiry
     license.token = create_license_token(
@@ -281,7 +441,10 @@ async def extend_license(
         max_devices=license.max_devices
     )
     
-    db.commit()
+    await db.commit()
+    license_cache.invalidate(license.id)
+    response_cache.invalidate(f"license:{license.id}")
+    admin_stats.license_status_changed(previous_status, license.status)
     
     return {
         "success": True,
@@ -290,15 +453,29 @@ async def extend_license(
     }
 
 
+@router.get("/jwks.json")
+async def license_jwks(response: Response):
+    """Public keys for verifying license tokens offline"""
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return license_signing.jwks()
+
+
 @router.get("/{license_id}")
 async def get_license(
     license_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get license details"""
     
-    license = db.query(License).filter(License.id == license_id).first()
+    # Entries are per user, so a hit was already permission-checked for this caller
+    scope = f"license:{license_id}"
+    cached = response_cache.lookup(request, scope, current_user.id)
+    if cached is not None:
+        return cached
+    
+    license = await db.get(License, license_id)
     if not license:
         raise HTTPException(status_code=404, detail="License not found")
     
@@ -306,9 +483,9 @@ async def get_license(
     if current_user.role.value == "user" and license.owner_email != current_user.email:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    devices = db.query(Device).filter(Device.license_id == license.id).all()
+    devices = (await db.execute(select(Device).where(Device.license_id == license.id))).scalars().all()
     
-    return {
+    return response_cache.respond(request, scope, current_user.id, {
         "id": str(license.id),
         "human_key": license.human_key,
         "owner_email": license.owner_email,
@@ -325,4 +502,4 @@ async def get_license(
                 "last_seen": d.last_seen.isoformat()
             } for d in devices
         ]
-    }
+    })
@@ -9,6 +9,8 @@ from app.database import get_db
 from app.models import User, Payment, PaymentStatus
 from app.auth import get_current_user
 from app.config import settings
+from app.response_cache import response_cache
+from app.services import admin_stats, daily_rollups
 
 router = APIRouter()
 
@@ -73,6 +75,7 @@ async def create_checkout(
             )
             db.add(payment)
             db.commit()
+            response_cache.invalidate(f"payments:{current_user.id}")
             
             return {
                 "checkout_url": session.url,
@@ -108,6 +111,7 @@ async def create_checkout(
             )
             db.add(payment)
             db.commit()
+            response_cache.invalidate(f"payments:{current_user.id}")
             
             return {
                 "order_id": order['id'],
@@ -144,10 +148,14 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             Payment.provider_payment_id == session['id']
         ).first()
         
-        if payment:
+        # Providers retry webhooks, so only the first completion counts
+        if payment and payment.status != PaymentStatus.COMPLETED:
             payment.status = PaymentStatus.COMPLETED
             payment.completed_at = datetime.utcnow()
+            daily_rollups.record_payment(db, payment)
             db.commit()
+            admin_stats.payment_completed(payment.amount)
+            response_cache.invalidate(f"payments:{payment.user_id}")
             
             # TODO: Generate and send license to user
     
@@ -170,11 +178,14 @@ async def razorpay_webhook(request: Request, db: Session = Depends(get_db)):
             Payment.provider_payment_id == payment_data['order_id']
         ).first()
         
-        if payment:
+        if payment and payment.status != PaymentStatus.COMPLETED:
             payment.status = PaymentStatus.COMPLETED
             payment.completed_at = datetime.utcnow()
             payment.meta_data = {'razorpay_payment_id': payment_data['id']}
+            daily_rollups.record_payment(db, payment)
             db.commit()
+            admin_stats.payment_completed(payment.amount)
+            response_cache.invalidate(f"payments:{payment.user_id}")
             
             # TODO: Generate and send license to user
     
@@ -183,16 +194,23 @@ async def razorpay_webhook(request: Request, db: Session = Depends(get_db)):
 
 @router.get("/history")
 async def get_payment_history(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user payment history"""
     
+    scope = f"payments:{current_user.id}"
+    # Misses read the primary so a lagging replica is never cached; hits are the offload
+    cached = response_cache.lookup(request, scope, current_user.id)
+    if cached is not None:
+        return cached
+    
     payments = db.query(Payment).filter(
         Payment.user_id == current_user.id
     ).order_by(Payment.created_at.desc()).all()
     
-    return {
+    return response_cache.respond(request, scope, current_user.id, {
         "payments": [
             {
                 "id": p.id,
@@ -205,4 +223,4 @@ async def get_payment_history(
                 "completed_at": p.completed_at.isoformat() if p.completed_at else None
             } for p in payments
         ]
-    }
+    })
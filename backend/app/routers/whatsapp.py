@@ -2,16 +2,20 @@
 WhatsApp API Routes
 Endpoints for sending WhatsApp messages
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime
+import redis
 
+from app.config import settings
 from app.database import get_db
 from app.auth import get_current_user
 from app.models import User
 from app.services.whatsapp_service import whatsapp_service
+from app.services import message_index, webhook_ingest
 
 router = APIRouter()
 
@@ -21,6 +25,8 @@ class SendMessageRequest(BaseModel):
     to: str
     message: str
     preview_url: bool = False
+    campaign_id: Optional[int] = None
+    contact_id: Optional[int] = None
 
 
 class SendTemplateRequest(BaseModel):
@@ -28,6 +34,8 @@ class SendTemplateRequest(BaseModel):
     template_name: str
     language_code: str = "en_US"
     variables: Optional[Dict[str, str]] = None
+    campaign_id: Optional[int] = None
+    contact_id: Optional[int] = None
 
 
 class SendCampaignRequest(BaseModel):
@@ -42,12 +50,15 @@ class SendMediaRequest(BaseModel):
     media_type: str  # image, video, document, audio
     media_url: str
     caption: Optional[str] = None
+    campaign_id: Optional[int] = None
+    contact_id: Optional[int] = None
 
 
 # API Endpoints
 @router.post("/send-text")
 async def send_text_message(
     request: SendMessageRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -82,6 +93,8 @@ async def send_text_message(
             detail=f"Failed to send message: {result.get('error', 'Unknown error')}"
         )
     
+    message_index.record(db, result["message_id"], current_user.id, request.campaign_id, request.contact_id)
+    
     return {
         "success": True,
         "message_id": result["message_id"],
@@ -93,6 +106,7 @@ async def send_text_message(
 @router.post("/send-template")
 async def send_template_message(
     request: SendTemplateRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -139,6 +153,8 @@ async def send_template_message(
             detail=f"Failed to send template: {result.get('error', 'Unknown error')}"
         )
     
+    message_index.record(db, result["message_id"], current_user.id, request.campaign_id, request.contact_id)
+    
     return {
         "success": True,
         "message_id": result["message_id"],
@@ -151,6 +167,7 @@ async def send_template_message(
 @router.post("/send-media")
 async def send_media_message(
     request: SendMediaRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -195,6 +212,8 @@ async def send_media_message(
             detail=f"Failed to send media: {result.get('error', 'Unknown error')}"
         )
     
+    message_index.record(db, result["message_id"], current_user.id, request.campaign_id, request.contact_id)
+    
     return {
         "success": True,
         "message_id": result["message_id"],
@@ -208,6 +227,7 @@ async def send_media_message(
 async def send_campaign(
     request: SendCampaignRequest,
     background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -243,6 +263,7 @@ async def send_campaign(
     
     # Send messages in background
     results = []
+    sent = []
     for phone in request.contacts:
         formatted_phone = whatsapp_service.format_phone_number(phone)
         
@@ -253,6 +274,9 @@ async def send_campaign(
             language_code=request.language_code
         )
         
+        if result["success"]:
+            sent.append(message_index.record(db, result["message_id"], current_user.id, commit=False))
+        
         results.append({
             "phone": formatted_phone,
             "success": result["success"],
@@ -260,6 +284,10 @@ async def send_campaign(
             "error": result.get("error")
         })
     
+    # One transaction for the whole batch, then warm the status cache
+    db.commit()
+    message_index.cache_entries(sent)
+    
     # Count successes and failures
     successful = sum(1 for r in results if r["success"])
     failed = len(results) - successful
@@ -277,18 +305,65 @@ async def send_campaign(
 @router.get("/message-status/{message_id}")
 async def get_message_status(
     message_id: str,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get the status of a sent message
     
     Note: WhatsApp uses webhooks for real-time status updates.
-    This endpoint returns cached status information.
+    This endpoint returns the last state received, served from the Redis
+    cache and falling back to the message index.
     """
-    status = whatsapp_service.get_message_status(message_id)
+    status = message_index.get_status(db, message_id)
+    if not status or status["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Message not found")
     return status
 
 
+@router.get("/webhook")
+async def verify_webhook(
+    hub_mode: str = Query(None, alias="hub.mode"),
+    hub_verify_token: str = Query(None, alias="hub.verify_token"),
+    hub_challenge: str = Query(None, alias="hub.challenge")
+):
+    """
+    Webhook verification handshake
+    
+    Meta calls this once with the configured verify token and expects the
+    challenge echoed back as plain text.
+    """
+    if (
+        hub_mode == "subscribe"
+        and settings.WHATSAPP_VERIFY_TOKEN
+        and hub_verify_token == settings.WHATSAPP_VERIFY_TOKEN
+    ):
+        return PlainTextResponse(hub_challenge or "")
+    raise HTTPException(status_code=403, detail="Webhook verification failed")
+
+
+@router.post("/webhook")
+async def receive_webhook(request: Request):
+    """
+    Receive delivery and read receipts
+    
+    The payload is queued as-is and acknowledged immediately; worker
+    consumers apply the status updates in batches.
+    """
+    payload = await request.body()
+    
+    if not webhook_ingest.verify_signature(payload, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=403, detail="Invalid signature")
+    
+    try:
+        webhook_ingest.enqueue(payload)
+    except redis.RedisError:
+        # A non-2xx response makes Meta retry the delivery later
+        raise HTTPException(status_code=503, detail="Webhook queue unavailable")
+    
+    return {"status": "received"}
+
+
 @router.post("/validate-phone")
 async def validate_phone_number(
     phone: str,
@@ -1,4 +1,5 @@
 """Services package"""
 from .whatsapp_service import whatsapp_service
+from .log_writer import log_writer
 
-__all__ = ["whatsapp_service"]
+__all__ = ["whatsapp_service", "log_writer"]
@@ -0,0 +1,184 @@
+"""
+Admin Stats
+Dashboard counters kept in a Redis hash: the events that change them bump the
+counters after committing, and the worker periodically rebuilds the hash from
+the database to correct any drift
+"""
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional
+
+import redis
+from sqlalchemy import case, func, select
+
+from app.database import engine
+from app.models import Campaign, License, LicenseStatus, Payment, PaymentStatus, User
+from app.redis_client import redis_client
+from app.services.daily_rollups import utc_date, utc_day
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "admin:stats"
+_REBUILD_SUFFIX = ":rebuild"
+
+# Windowed figures are summed from per-day fields, so they are exact to the day
+MONTHLY_DAYS = 30
+RECENT_DAYS = 7
+
+_STATUS_FIELDS = {
+    LicenseStatus.ACTIVE: "licenses_active",
+    LicenseStatus.EXPIRED: "licenses_expired",
+}
+
+
+def _day_field(prefix: str, day) -> str:
+    # Days are UTC calendar days, like the timestamps counted into them
+    return f"{prefix}:{day}"
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _increment(fields: Dict[str, float]) -> None:
+    """Apply counter deltas; a missed update is corrected by the next reconcile"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for field, delta in fields.items():
+            if isinstance(delta, int):
+                pipe.hincrby(STATS_KEY, field, delta)
+            else:
+                pipe.hincrbyfloat(STATS_KEY, field, delta)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not update admin stats {', '.join(fields)}: {str(e)}")
+
+
+def users_added(count: int = 1) -> None:
+    _increment({"users_total": count, "users_active": count})
+
+
+def user_active_changed(is_active: bool) -> None:
+    _increment({"users_active": 1 if is_active else -1})
+
+
+def licenses_issued(count: int = 1) -> None:
+    _increment({
+        "licenses_total": count,
+        "licenses_active": count,
+        _day_field("issued", utc_day()): count,
+    })
+
+
+def license_status_changed(old: LicenseStatus, new: LicenseStatus, count: int = 1) -> None:
+    fields: Dict[str, float] = {}
+    if old in _STATUS_FIELDS:
+        fields[_STATUS_FIELDS[old]] = -count
+    if new in _STATUS_FIELDS:
+        fields[_STATUS_FIELDS[new]] = fields.get(_STATUS_FIELDS[new], 0) + count
+    if any(fields.values()):
+        _increment(fields)
+
+
+def payment_completed(amount) -> None:
+    _increment({
+        "revenue_total": float(amount),
+        _day_field("revenue", utc_day()): float(amount),
+    })
+
+
+def campaigns_changed(delta: int) -> None:
+    _increment({"campaigns_total": delta})
+
+
+def compute(conn) -> Dict[str, float]:
+    """Every counter straight from the database (a Session or a Connection)"""
+    today = utc_day()
+    fields: Dict[str, float] = {}
+
+    users = conn.execute(
+        select(func.count(), func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0))
+    ).one()
+    fields["users_total"], fields["users_active"] = int(users[0]), int(users[1])
+
+    by_status = dict(conn.execute(select(License.status, func.count()).group_by(License.status)).all())
+    fields["licenses_total"] = sum(by_status.values())
+    for status, field in _STATUS_FIELDS.items():
+        fields[field] = by_status.get(status, 0)
+
+    issued_day = utc_date(License.issued_at)
+    for day, count in conn.execute(
+        select(issued_day, func.count())
+        .where(License.issued_at >= _utc_midnight(today - timedelta(days=RECENT_DAYS)))
+        .group_by(issued_day)
+    ).all():
+        fields[_day_field("issued", day)] = count
+
+    completed_at = func.coalesce(Payment.completed_at, Payment.created_at)
+    completed = Payment.status == PaymentStatus.COMPLETED
+    fields["revenue_total"] = float(
+        conn.execute(select(func.coalesce(func.sum(Payment.amount), 0)).where(completed)).scalar()
+    )
+    revenue_day = utc_date(completed_at)
+    for day, amount in conn.execute(
+        select(revenue_day, func.sum(Payment.amount))
+        .where(completed, completed_at >= _utc_midnight(today - timedelta(days=MONTHLY_DAYS)))
+        .group_by(revenue_day)
+    ).all():
+        fields[_day_field("revenue", day)] = float(amount)
+
+    fields["campaigns_total"] = conn.execute(select(func.count()).select_from(Campaign)).scalar()
+    return fields
+
+
+def reconcile() -> Dict[str, float]:
+    """
+    Periodic job: rebuild the hash from the database and swap it in. Events
+    landing between the count and the swap are lost until the next run.
+    """
+    with engine.connect() as conn:
+        fields = compute(conn)
+    rebuild = STATS_KEY + _REBUILD_SUFFIX
+    pipe = redis_client.pipeline()
+    pipe.delete(rebuild)
+    pipe.hset(rebuild, mapping=fields)
+    pipe.rename(rebuild, STATS_KEY)
+    pipe.execute()
+    return fields
+
+
+def _window(fields: Dict, prefix: str, days: int) -> float:
+    today = utc_day()
+    return sum(float(fields.get(_day_field(prefix, today - timedelta(days=i)), 0)) for i in range(days + 1))
+
+
+def snapshot(db) -> Dict:
+    """Dashboard figures from one hash read; rebuilt on a cold start, computed directly if Redis is down"""
+    fields: Optional[Dict] = None
+    try:
+        raw = redis_client.hgetall(STATS_KEY)
+        fields = {k.decode(): float(v) for k, v in raw.items()} if raw else reconcile()
+    except redis.RedisError as e:
+        logger.warning(f"Admin stats unavailable in Redis, counting directly: {str(e)}")
+    if fields is None:
+        fields = compute(db)
+
+    return {
+        "users": {
+            "total": int(fields.get("users_total", 0)),
+            "active": int(fields.get("users_active", 0))
+        },
+        "licenses": {
+            "total": int(fields.get("licenses_total", 0)),
+            "active": int(fields.get("licenses_active", 0)),
+            "expired": int(fields.get("licenses_expired", 0)),
+            "recent_activations": int(_window(fields, "issued", RECENT_DAYS))
+        },
+        "revenue": {
+            "total": round(fields.get("revenue_total", 0.0), 2),
+            "monthly": round(_window(fields, "revenue", MONTHLY_DAYS), 2)
+        },
+        "campaigns": {
+            "total": int(fields.get("campaigns_total", 0))
+        }
+    }
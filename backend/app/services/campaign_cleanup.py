@@ -0,0 +1,81 @@
+"""
+Campaign Cleanup Service
+Purges campaigns marked DELETING in bounded id-range chunks, one short
+transaction per chunk, so large deletions never hold long locks
+"""
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.database import engine
+from app.models import Campaign, CampaignStatus, Contact, Log, LogRollupDaily, LogRollupHourly, MessageIndex
+from app.services import admin_stats
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_children(table, campaign_id: int, chunk_size: int, throttle: float) -> int:
+    """Delete every row of table belonging to campaign_id, lowest ids first"""
+    deleted = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(table.c.id)
+                .where(table.c.campaign_id == campaign_id, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                return deleted
+            # ids are the campaign's next chunk_size rows, so this range holds exactly those rows
+            conn.execute(
+                delete(table).where(
+                    table.c.campaign_id == campaign_id,
+                    table.c.id.between(ids[0], ids[-1])
+                )
+            )
+        deleted += len(ids)
+        last_id = ids[-1]
+        if throttle:
+            time.sleep(throttle)
+
+
+def purge_campaign(
+    campaign_id: int,
+    chunk_size: Optional[int] = None,
+    throttle: Optional[float] = None
+) -> None:
+    """Remove a DELETING campaign's logs, contacts, message index entries and rollups, then the campaign"""
+    chunk_size = chunk_size or settings.CAMPAIGN_DELETE_CHUNK_SIZE
+    throttle = settings.CAMPAIGN_DELETE_THROTTLE_SECONDS if throttle is None else throttle
+
+    # Logs reference contacts, so they go first
+    logs = _purge_children(Log.__table__, campaign_id, chunk_size, throttle)
+    contacts = _purge_children(Contact.__table__, campaign_id, chunk_size, throttle)
+    _purge_children(MessageIndex.__table__, campaign_id, chunk_size, throttle)
+
+    with engine.begin() as conn:
+        for rollup in (LogRollupHourly, LogRollupDaily):
+            conn.execute(delete(rollup).where(rollup.source == "logs", rollup.campaign_id == campaign_id))
+        purged = conn.execute(
+            delete(Campaign).where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.DELETING)
+        ).rowcount
+    if purged:
+        admin_stats.campaigns_changed(-1)
+
+    logger.info(f"Purged campaign {campaign_id}: {contacts} contacts, {logs} logs")
+
+
+def purge_deleted_campaigns() -> None:
+    """Periodic job: purge every campaign currently marked DELETING"""
+    with engine.connect() as conn:
+        campaign_ids = conn.execute(
+            select(Campaign.id).where(Campaign.status == CampaignStatus.DELETING).order_by(Campaign.id)
+        ).scalars().all()
+
+    for campaign_id in campaign_ids:
+        purge_campaign(campaign_id)
@@ -0,0 +1,152 @@
+"""
+Contact Segments
+Parses segment expressions over a JSON attribute column, e.g.
+`city=Mumbai AND tier in (gold, silver)`, and compiles them to SQL: JSONB
+containment (@>) on PostgreSQL, which the column's GIN index serves, and
+JSON path comparisons elsewhere
+"""
+import re
+from typing import List, Tuple
+
+from sqlalchemy import and_, not_, or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.database import engine
+
+MAX_CLAUSES = 20
+MAX_VALUES = 100
+
+# (attribute, operator, values); operator is "=", "!=", "in" or "not in"
+Clause = Tuple[str, str, List[str]]
+
+_TOKEN = re.compile(r"""\s*(?:(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(?P<symbol>!=|=|\(|\)|,)|(?P<word>[^\s=!(),'"]+))""")
+_KEY = re.compile(r"^[\w\-]+$")
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unexpected character at position {position}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[str, str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ("end", "")
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def is_word(self, word: str) -> bool:
+        kind, value = self.peek()
+        return kind == "word" and value.lower() == word
+
+    def expect(self, symbol: str) -> None:
+        if self.take() != ("symbol", symbol):
+            raise ValueError(f"Expected '{symbol}'")
+
+    def value(self) -> str:
+        """A quoted string, or unquoted words up to the next operator or AND"""
+        kind, value = self.take()
+        if kind == "string":
+            return value
+        if kind != "word":
+            raise ValueError("Expected a value")
+        words = [value]
+        while self.peek()[0] == "word" and not self.is_word("and"):
+            words.append(self.take()[1])
+        return " ".join(words)
+
+    def clause(self) -> Clause:
+        kind, key = self.take()
+        if kind not in ("word", "string") or not _KEY.match(key):
+            raise ValueError("Expected an attribute name")
+
+        if self.peek()[0] == "symbol" and self.peek()[1] in ("=", "!="):
+            operator = self.take()[1]
+            return key, operator, [self.value()]
+
+        operator = "in"
+        if self.is_word("not"):
+            self.take()
+            operator = "not in"
+        if not self.is_word("in"):
+            raise ValueError(f"Expected =, !=, in or not in after '{key}'")
+        self.take()
+        self.expect("(")
+        values = [self.value()]
+        while self.peek() == ("symbol", ","):
+            self.take()
+            values.append(self.value())
+        self.expect(")")
+        if len(values) > MAX_VALUES:
+            raise ValueError(f"At most {MAX_VALUES} values per list")
+        return key, operator, values
+
+    def expression(self) -> List[Clause]:
+        clauses = [self.clause()]
+        while self.is_word("and"):
+            self.take()
+            clauses.append(self.clause())
+        if self.peek()[0] != "end":
+            raise ValueError(f"Unexpected '{self.peek()[1]}'")
+        if len(clauses) > MAX_CLAUSES:
+            raise ValueError(f"At most {MAX_CLAUSES} conditions per segment")
+        return clauses
+
+
+def parse(expression: str) -> List[Clause]:
+    """Parse a segment expression; raises ValueError with a readable message"""
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise ValueError("Segment is empty")
+    return _Parser(tokens).expression()
+
+
+def _candidates(value: str) -> list:
+    """Attribute values arrive as text; also match numbers and booleans stored as such"""
+    candidates = [value]
+    if value.lower() in ("true", "false"):
+        candidates.append(value.lower() == "true")
+    else:
+        try:
+            candidates.append(int(value))
+        except ValueError:
+            try:
+                candidates.append(float(value))
+            except ValueError:
+                pass
+    return candidates
+
+
+def _clause_filter(column, key: str, operator: str, values: List[str]):
+    if engine.dialect.name == "postgresql":
+        document = type_coerce(column, JSONB)
+        matches = or_(*[document.contains({key: candidate}) for value in values for candidate in _candidates(value)])
+        return not_(matches) if operator in ("!=", "not in") else matches
+
+    field = column[key].as_string()
+    if operator in ("=", "in"):
+        return field.in_(values)
+    return or_(field.is_(None), field.not_in(values))
+
+
+def segment_filter(column, expression: str):
+    """WHERE clause selecting rows whose JSON column matches the segment"""
+    return and_(*[_clause_filter(column, *clause) for clause in parse(expression)])
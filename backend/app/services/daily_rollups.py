@@ -0,0 +1,250 @@
+"""
+Daily Rollups
+Per-day revenue (by currency, provider and plan) and license issue, activation
+and expiry counts. Events add live deltas in their own transaction; the worker
+rebuilds recent days from the source tables to correct any drift
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models import Device, License, LicenseDaily, LicenseStatus, Payment, PaymentStatus, RevenueDaily
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("day", "week", "month")
+
+_REVENUE_KEYS = ["day", "currency", "provider", "plan"]
+_LICENSE_COUNTS = ("issued", "activated", "expired")
+
+
+def utc_day(value: Optional[datetime] = None) -> date:
+    """UTC calendar day of a timestamp (naive values are already UTC), or of now"""
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def utc_date(column):
+    """SQL date() of a timestamp column as its UTC calendar day, whatever the session TimeZone"""
+    if engine.dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    # SQLite holds naive UTC values
+    return func.date(column)
+
+
+def _as_date(value) -> date:
+    # SQLite returns date() results as ISO strings
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _upsert_statement(table, keys: List[str], counts: List[str], accumulate: bool, values: Optional[Dict] = None):
+    """INSERT that adds to (accumulate) or replaces the counts of a row that already exists"""
+    insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(table)
+    if values is not None:
+        stmt = stmt.values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            column: (table.c[column] + stmt.excluded[column]) if accumulate else stmt.excluded[column]
+            for column in counts
+        }
+    )
+
+
+def _upsert(conn, table, keys: List[str], rows: List[Dict], accumulate: bool) -> None:
+    if not rows:
+        return
+    counts = [column for column in rows[0] if column not in keys]
+    conn.execute(_upsert_statement(table, keys, counts, accumulate), rows)
+
+
+def payment_delta(payment: Payment):
+    """
+    Live delta for a payment completing, as a statement to execute inside the
+    transaction that completes it (on a Session or an AsyncSession)
+    """
+    return _upsert_statement(RevenueDaily.__table__, _REVENUE_KEYS, ["amount", "payments"], True, {
+        "day": utc_day(payment.completed_at),
+        "currency": payment.currency or "USD",
+        "provider": payment.provider,
+        "plan": payment.plan or "",
+        "amount": payment.amount,
+        "payments": 1,
+    })
+
+
+def license_delta(day: date, plan: str, issued: int = 0, activated: int = 0, expired: int = 0):
+    """Live delta for license events, as a statement to execute inside the transaction that causes them"""
+    return _upsert_statement(LicenseDaily.__table__, ["day", "plan"], list(_LICENSE_COUNTS), True, {
+        "day": day,
+        "plan": plan,
+        "issued": issued,
+        "activated": activated,
+        "expired": expired,
+    })
+
+
+def record_payment(conn, payment: Payment) -> None:
+    conn.execute(payment_delta(payment))
+
+
+def record_licenses(conn, day: date, plan: str, issued: int = 0, activated: int = 0, expired: int = 0) -> None:
+    conn.execute(license_delta(day, plan, issued, activated, expired))
+
+
+def rebuild(start: date) -> None:
+    """
+    Recompute every rollup row from `start` onwards. Pass an early date to
+    backfill the tables after the migration. Days are UTC calendar days.
+    """
+    completed_day = utc_date(func.coalesce(Payment.completed_at, Payment.created_at))
+    currency = func.coalesce(Payment.currency, "USD")
+    plan = func.coalesce(Payment.plan, "")
+
+    with engine.begin() as conn:
+        revenue_rows = [
+            {
+                "day": _as_date(row.day),
+                "currency": row.currency,
+                "provider": row.provider,
+                "plan": row.plan,
+                "amount": row.amount,
+                "payments": row.payments,
+            }
+            for row in conn.execute(
+                select(
+                    completed_day.label("day"),
+                    currency.label("currency"),
+                    Payment.provider,
+                    plan.label("plan"),
+                    func.sum(Payment.amount).label("amount"),
+                    func.count().label("payments"),
+                )
+                .where(Payment.status == PaymentStatus.COMPLETED, completed_day >= start)
+                .group_by(completed_day, currency, Payment.provider, plan)
+            ).all()
+        ]
+
+        license_counts: Dict = defaultdict(lambda: dict.fromkeys(_LICENSE_COUNTS, 0))
+        issued_day = utc_date(License.issued_at)
+        activated_day = utc_date(Device.activated_at)
+        expired_day = utc_date(License.expires_at)
+        for count, day_column, query in (
+            ("issued", issued_day, select(issued_day, License.plan, func.count())
+                .where(issued_day >= start)),
+            ("activated", activated_day, select(activated_day, License.plan, func.count())
+                .select_from(Device)
+                .join(License, License.id == Device.license_id)
+                .where(activated_day >= start)),
+            ("expired", expired_day, select(expired_day, License.plan, func.count())
+                .where(License.status == LicenseStatus.EXPIRED, expired_day >= start)),
+        ):
+            for day, license_plan, value in conn.execute(query.group_by(day_column, License.plan)).all():
+                license_counts[(_as_date(day), license_plan)][count] = value
+        license_rows = [
+            {"day": day, "plan": license_plan, **counts}
+            for (day, license_plan), counts in license_counts.items()
+        ]
+
+        # Upserts rather than inserts so live deltas racing the delete cannot conflict
+        conn.execute(delete(RevenueDaily).where(RevenueDaily.day >= start))
+        conn.execute(delete(LicenseDaily).where(LicenseDaily.day >= start))
+        _upsert(conn, RevenueDaily.__table__, _REVENUE_KEYS, revenue_rows, accumulate=False)
+        _upsert(conn, LicenseDaily.__table__, ["day", "plan"], license_rows, accumulate=False)
+
+    logger.info(f"Daily rollups since {start.isoformat()}: {len(revenue_rows)} revenue rows, {len(license_rows)} license rows")
+
+
+def run_rebuild() -> None:
+    """Periodic (nightly) job: rebuild the rollups for the lookback window"""
+    rebuild(utc_day() - timedelta(days=settings.DAILY_ROLLUP_LOOKBACK_DAYS))
+
+
+def _bucket(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _check_range(start: date, end: date, interval: str) -> None:
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    if end < start:
+        raise ValueError("end must not be before start")
+
+
+def revenue_series(
+    db: Session,
+    start: date,
+    end: date,
+    interval: str = "day",
+    currency: Optional[str] = None,
+    provider: Optional[str] = None,
+    plan: Optional[str] = None
+) -> List[Dict]:
+    """Revenue per interval and currency (amounts in different currencies are never summed)"""
+    _check_range(start, end, interval)
+    query = db.query(
+        RevenueDaily.day,
+        RevenueDaily.currency,
+        func.sum(RevenueDaily.amount),
+        func.sum(RevenueDaily.payments)
+    ).filter(RevenueDaily.day.between(start, end))
+    if currency:
+        query = query.filter(RevenueDaily.currency == currency.upper())
+    if provider:
+        query = query.filter(RevenueDaily.provider == provider)
+    if plan is not None:
+        query = query.filter(RevenueDaily.plan == plan)
+
+    buckets: Dict = defaultdict(lambda: {"amount": 0.0, "payments": 0})
+    for day, row_currency, amount, payments in query.group_by(RevenueDaily.day, RevenueDaily.currency).all():
+        entry = buckets[(_bucket(_as_date(day), interval), row_currency)]
+        entry["amount"] += float(amount)
+        entry["payments"] += payments
+
+    return [
+        {"date": bucket.isoformat(), "currency": row_currency, "amount": round(entry["amount"], 2), "payments": entry["payments"]}
+        for (bucket, row_currency), entry in sorted(buckets.items())
+    ]
+
+
+def license_series(
+    db: Session,
+    start: date,
+    end: date,
+    interval: str = "day",
+    plan: Optional[str] = None
+) -> List[Dict]:
+    """License issue, activation and expiry counts per interval"""
+    _check_range(start, end, interval)
+    query = db.query(
+        LicenseDaily.day,
+        func.sum(LicenseDaily.issued),
+        func.sum(LicenseDaily.activated),
+        func.sum(LicenseDaily.expired)
+    ).filter(LicenseDaily.day.between(start, end))
+    if plan is not None:
+        query = query.filter(LicenseDaily.plan == plan)
+
+    buckets: Dict = defaultdict(lambda: dict.fromkeys(_LICENSE_COUNTS, 0))
+    for day, *values in query.group_by(LicenseDaily.day).all():
+        entry = buckets[_bucket(_as_date(day), interval)]
+        for count, value in zip(_LICENSE_COUNTS, values):
+            entry[count] += value
+
+    return [{"date": bucket.isoformat(), **entry} for bucket, entry in sorted(buckets.items())]
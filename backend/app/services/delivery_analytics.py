@@ -0,0 +1,168 @@
+"""
+Delivery Analytics
+Rolls campaign_contacts timestamps up into hourly funnel, latency histogram
+and error-code tables, and summarises them for the analytics endpoint
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models_enhanced import CampaignDeliveryStats, CampaignErrorStats
+
+logger = logging.getLogger(__name__)
+
+# Exclusive upper bounds (seconds) of the send-to-delivery latency buckets
+LATENCY_BUCKETS = [1, 5, 15, 30, 60, 300, 900, 3600, 21600, 86400]
+
+_BOUNDS_SQL = "ARRAY[" + ", ".join(str(b) for b in LATENCY_BUCKETS) + "]::float8[]"
+
+# Hour of the send (or failure), truncated in UTC: date_trunc on a timestamptz
+# follows the session TimeZone, which is off for half-hour offsets
+_COHORT_HOUR_SQL = "timezone('UTC', date_trunc('hour', timezone('UTC', COALESCE(sent_at, failed_at))))"
+
+
+def rollup(start: datetime) -> None:
+    """
+    Rebuild every hourly row from `start` onwards. Messages are bucketed by
+    the hour they were sent (or failed), so late receipts for that hour are
+    picked up as long as the hour is still inside the lookback window.
+    Error rows use the same cohort hour, so the rows deleted here are exactly
+    the ones selected again.
+    """
+    with engine.begin() as conn:
+        funnel_rows = conn.execute(text(f"""
+            SELECT campaign_id,
+                   {_COHORT_HOUR_SQL} AS hour,
+                   CASE WHEN sent_at IS NOT NULL AND delivered_at IS NOT NULL
+                        THEN width_bucket(EXTRACT(EPOCH FROM delivered_at - sent_at), {_BOUNDS_SQL})
+                   END AS bucket,
+                   count(sent_at) AS sent,
+                   count(delivered_at) AS delivered,
+                   count(read_at) AS read,
+                   count(failed_at) AS failed,
+                   COALESCE(sum(EXTRACT(EPOCH FROM delivered_at - sent_at)), 0) AS latency_sum
+            FROM campaign_contacts
+            WHERE COALESCE(sent_at, failed_at) >= :start
+            GROUP BY 1, 2, 3
+        """), {"start": start}).all()
+
+        error_rows = conn.execute(text(f"""
+            SELECT campaign_id,
+                   {_COHORT_HOUR_SQL} AS hour,
+                   COALESCE(error_code, 'unknown') AS error_code,
+                   count(*) AS count
+            FROM campaign_contacts
+            WHERE failed_at IS NOT NULL AND COALESCE(sent_at, failed_at) >= :start
+            GROUP BY 1, 2, 3
+        """), {"start": start}).all()
+
+        # Fold the per-latency-bucket groups into one row per (campaign, hour)
+        stats: Dict = {}
+        for row in funnel_rows:
+            entry = stats.setdefault((row.campaign_id, row.hour), {
+                "campaign_id": row.campaign_id,
+                "hour": row.hour,
+                "sent": 0,
+                "delivered": 0,
+                "read": 0,
+                "failed": 0,
+                "latency_sum_seconds": 0.0,
+                "latency_histogram": [0] * (len(LATENCY_BUCKETS) + 1),
+            })
+            entry["sent"] += row.sent
+            entry["delivered"] += row.delivered
+            entry["read"] += row.read
+            entry["failed"] += row.failed
+            entry["latency_sum_seconds"] += float(row.latency_sum)
+            if row.bucket is not None:
+                # width_bucket: 0 is below the first bound, len(bounds) is overflow
+                entry["latency_histogram"][min(row.bucket, len(LATENCY_BUCKETS))] += row.sent
+
+        conn.execute(delete(CampaignDeliveryStats).where(CampaignDeliveryStats.hour >= start))
+        conn.execute(delete(CampaignErrorStats).where(CampaignErrorStats.hour >= start))
+        if stats:
+            conn.execute(insert(CampaignDeliveryStats), list(stats.values()))
+        if error_rows:
+            conn.execute(insert(CampaignErrorStats), [row._asdict() for row in error_rows])
+
+    logger.info(f"Delivery rollup since {start.isoformat()}: {len(stats)} hourly rows, {len(error_rows)} error rows")
+
+
+def run_rollup() -> None:
+    """Periodic job: refresh the rollups for the lookback window"""
+    if engine.dialect.name != "postgresql":
+        return
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    rollup(start - timedelta(hours=settings.ANALYTICS_ROLLUP_LOOKBACK_HOURS))
+
+
+def _percentile(histogram: List[int], fraction: float) -> Optional[int]:
+    """Upper bound of the bucket containing the given fraction of delivered messages"""
+    total = sum(histogram)
+    if not total:
+        return None
+    threshold = total * fraction
+    running = 0
+    for i, count in enumerate(histogram):
+        running += count
+        if running >= threshold:
+            return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else None
+    return None
+
+
+def campaign_summary(db: Session, campaign_id: int) -> Dict:
+    """Funnel, latency distribution and error breakdown from the rollup tables only"""
+    hourly = db.query(CampaignDeliveryStats).filter(
+        CampaignDeliveryStats.campaign_id == campaign_id
+    ).order_by(CampaignDeliveryStats.hour).all()
+    errors = db.query(CampaignErrorStats).filter(CampaignErrorStats.campaign_id == campaign_id).all()
+
+    histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+    totals = {"sent": 0, "delivered": 0, "read": 0, "failed": 0}
+    latency_sum = 0.0
+    for row in hourly:
+        for key in totals:
+            totals[key] += getattr(row, key)
+        latency_sum += row.latency_sum_seconds
+        for i, count in enumerate(row.latency_histogram or []):
+            histogram[i] += count
+
+    error_counts: Dict[str, int] = {}
+    for row in errors:
+        error_counts[row.error_code] = error_counts.get(row.error_code, 0) + row.count
+
+    delivered_with_latency = sum(histogram)
+    return {
+        "funnel": {
+            **totals,
+            "delivery_rate": round(totals["delivered"] / totals["sent"] * 100, 2) if totals["sent"] else 0,
+            "read_rate": round(totals["read"] / totals["delivered"] * 100, 2) if totals["delivered"] else 0,
+        },
+        "latency": {
+            "mean_seconds": round(latency_sum / delivered_with_latency, 2) if delivered_with_latency else None,
+            "p50_seconds": _percentile(histogram, 0.5),
+            "p90_seconds": _percentile(histogram, 0.9),
+            "histogram": [
+                {"lt": LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else None, "count": count}
+                for i, count in enumerate(histogram)
+            ],
+        },
+        "errors": [
+            {"code": code, "count": count}
+            for code, count in sorted(error_counts.items(), key=lambda item: -item[1])
+        ],
+        "hourly": [
+            {
+                "hour": row.hour.isoformat(),
+                "sent": row.sent,
+                "delivered": row.delivered,
+                "read": row.read,
+                "failed": row.failed,
+            } for row in hourly
+        ],
+    }
@@ -0,0 +1,109 @@
+"""
+License Validation Cache
+Keeps successful (license_id, hwid) validation results in process memory.
+Changes to a license are broadcast on a Redis pub/sub channel so every API
+process drops its entries at once; while a process is not subscribed the
+cache is bypassed, since it could miss invalidations.
+"""
+import logging
+import threading
+from typing import Dict, Optional
+
+import redis
+
+from app.cache import TTLCache
+from app.config import settings
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "license:invalidate"
+
+
+class LicenseCache:
+    """license_id -> {hwid: validation result}, invalidated through Redis pub/sub"""
+
+    def __init__(self, ttl: float, max_size: int, reconnect_delay: float = 5.0):
+        self._entries = TTLCache(ttl=ttl, max_size=max_size)
+        self.reconnect_delay = reconnect_delay
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._listening = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def generation(self) -> int:
+        """Read before loading from the database and pass to set()"""
+        return self._generation
+
+    def get(self, license_id: str, hwid: str) -> Optional[Dict]:
+        if not self._listening.is_set():
+            return None
+        devices = self._entries.get(license_id)
+        return devices.get(hwid) if devices else None
+
+    def set(self, license_id: str, hwid: str, result: Dict, generation: int) -> None:
+        """Store a result unless an invalidation arrived since `generation` was read"""
+        if not self._listening.is_set():
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            devices = dict(self._entries.get(license_id) or {})
+            devices[hwid] = result
+            self._entries.set(license_id, devices)
+
+    def _drop(self, license_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if license_id is None:
+                self._entries.clear()
+            else:
+                self._entries.delete(license_id)
+
+    def invalidate(self, license_id: str) -> None:
+        """Drop a license everywhere; call after committing the change"""
+        self._drop(license_id)
+        try:
+            redis_client.publish(CHANNEL, license_id)
+        except redis.RedisError as e:
+            logger.warning(f"Could not broadcast license invalidation: {str(e)}")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._listen, name="license-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stop_event.is_set():
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CHANNEL)
+                self._listening.set()
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._drop(message["data"].decode())
+            except redis.RedisError as e:
+                logger.warning(f"License cache subscription lost: {str(e)}")
+            finally:
+                # Invalidations may be missed while unsubscribed
+                self._listening.clear()
+                self._drop()
+                pubsub.close()
+            self._stop_event.wait(self.reconnect_delay)
+
+
+license_cache = LicenseCache(
+    ttl=settings.LICENSE_CACHE_TTL_SECONDS,
+    max_size=settings.LICENSE_CACHE_MAX_SIZE
+)
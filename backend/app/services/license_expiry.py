@@ -0,0 +1,78 @@
+"""
+License Expiry Sweeper
+Flips ACTIVE licenses past expires_at to EXPIRED in bounded set-based updates
+on the (status, expires_at) index and announces each expiry
+"""
+import json
+import logging
+from collections import Counter
+from typing import List
+
+import redis
+from sqlalchemy import func, select, update
+
+from app.database import engine
+from app.models import License, LicenseStatus
+from app.redis_client import redis_client
+from app.response_cache import response_cache
+from app.services import admin_stats, daily_rollups
+from app.services.license_cache import license_cache
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "license:events"
+_BATCH_SIZE = 1000
+
+
+def _expire_batch(conn) -> List:
+    due = (
+        select(License.id)
+        .where(License.status == LicenseStatus.ACTIVE, License.expires_at <= func.now())
+        .limit(_BATCH_SIZE)
+    )
+    if conn.dialect.name == "postgresql":
+        # Concurrent sweepers split the work instead of waiting on each other
+        due = due.with_for_update(skip_locked=True)
+    return conn.execute(
+        update(License)
+        .where(License.id.in_(due.scalar_subquery()))
+        .values(status=LicenseStatus.EXPIRED)
+        .returning(License.id, License.owner_email, License.plan, License.expires_at)
+    ).all()
+
+
+def _announce(expired: List) -> None:
+    for row in expired:
+        license_cache.invalidate(row.id)
+    response_cache.invalidate(*[f"license:{row.id}" for row in expired])
+    admin_stats.license_status_changed(LicenseStatus.ACTIVE, LicenseStatus.EXPIRED, len(expired))
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for row in expired:
+            pipe.publish(EVENTS_CHANNEL, json.dumps({
+                "event": "license.expired",
+                "license_id": row.id,
+                "owner_email": row.owner_email,
+                "expires_at": row.expires_at.isoformat(),
+            }))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish {len(expired)} license expiry events: {str(e)}")
+
+
+def sweep() -> int:
+    """Periodic job: expire every license that is past its expiry time"""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            expired = _expire_batch(conn)
+            for (day, plan), count in Counter((daily_rollups.utc_day(row.expires_at), row.plan) for row in expired).items():
+                daily_rollups.record_licenses(conn, day, plan, expired=count)
+        if not expired:
+            break
+        _announce(expired)
+        total += len(expired)
+        logger.info(f"Expired {len(expired)} licenses")
+        if len(expired) < _BATCH_SIZE:
+            break
+    return total
@@ -0,0 +1,111 @@
+"""
+License Heartbeats
+/licenses/validate records last-seen times in Redis hashes; the worker flushes
+them to devices.last_seen and licenses.last_validated in batched updates
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import redis
+from sqlalchemy import bindparam, or_, text, update
+from starlette.concurrency import run_in_threadpool
+
+from app.database import engine
+from app.models import Device, License
+from app.redis_client import redis_client
+from app.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+DEVICE_KEY = "heartbeat:devices"
+LICENSE_KEY = "heartbeat:licenses"
+_FLUSHING_SUFFIX = ":flushing"
+_CHUNK_SIZE = 1000
+
+
+async def record(license_id: str, device_id: int) -> None:
+    """
+    Remember a heartbeat; later calls simply overwrite earlier ones. Falls back
+    to writing the timestamps directly, in the threadpool so the event loop
+    keeps serving, if Redis is unavailable.
+    """
+    now = time.time()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(DEVICE_KEY, str(device_id), now)
+        pipe.hset(LICENSE_KEY, license_id, now)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Heartbeat buffer unavailable, writing directly: {str(e)}")
+        await run_in_threadpool(_write, license_id, device_id, now)
+
+
+def _write(license_id: str, device_id: int, seen_at: float) -> None:
+    with engine.begin() as conn:
+        _apply(conn, Device.__table__, "last_seen", [(device_id, seen_at)])
+        _apply(conn, License.__table__, "last_validated", [(license_id, seen_at)])
+
+
+def _apply(conn, table, column: str, rows: List[Tuple]) -> None:
+    """Set column to each row's timestamp unless the stored value is already newer"""
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        chunk = rows[start:start + _CHUNK_SIZE]
+        if conn.dialect.name == "postgresql":
+            params: Dict = {}
+            values = []
+            for i, (row_id, ts) in enumerate(chunk):
+                params[f"id_{i}"] = row_id
+                params[f"ts_{i}"] = ts
+                values.append(f"(:id_{i}, :ts_{i})")
+            conn.execute(text(f"""
+                UPDATE {table.name}
+                SET {column} = to_timestamp(v.ts)
+                FROM (VALUES {", ".join(values)}) AS v(id, ts)
+                WHERE {table.name}.id = v.id
+                  AND ({table.name}.{column} IS NULL OR {table.name}.{column} < to_timestamp(v.ts))
+            """), params)
+        else:
+            conn.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam("row_id"),
+                    or_(table.c[column].is_(None), table.c[column] < bindparam("seen_at"))
+                )
+                .values({column: bindparam("seen_at")}),
+                [{"row_id": row_id, "seen_at": datetime.utcfromtimestamp(ts)} for row_id, ts in chunk]
+            )
+
+
+def _take(key: str) -> Dict[bytes, bytes]:
+    """
+    Move the hash aside and read it, so heartbeats arriving during the flush
+    land in a fresh hash. A leftover from a crashed flush is retried first.
+    """
+    flushing = key + _FLUSHING_SUFFIX
+    if not redis_client.exists(flushing):
+        try:
+            redis_client.rename(key, flushing)
+        except redis.ResponseError:
+            return {}  # Nothing recorded since the last flush
+    return redis_client.hgetall(flushing)
+
+
+def flush() -> None:
+    """Periodic job: write buffered heartbeats to the database"""
+    for key, table, column, cast in (
+        (DEVICE_KEY, Device.__table__, "last_seen", int),
+        (LICENSE_KEY, License.__table__, "last_validated", str),
+    ):
+        entries = _take(key)
+        if not entries:
+            continue
+        rows = [(cast(row_id.decode()), float(ts)) for row_id, ts in entries.items()]
+        with engine.begin() as conn:
+            _apply(conn, table, column, rows)
+        redis_client.delete(key + _FLUSHING_SUFFIX)
+        if key == LICENSE_KEY:
+            # Cached license details show last_validated and device last_seen
+            response_cache.invalidate(*[f"license:{row_id}" for row_id, _ in rows])
+        logger.info(f"Flushed {len(rows)} heartbeats to {table.name}")
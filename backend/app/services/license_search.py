@@ -0,0 +1,105 @@
+"""
+License Search
+Admin console search over owner_email and human_key. Human-key prefixes use
+the varchar_pattern_ops btree, longer terms the pg_trgm GIN indexes; short
+terms (too short for trigrams) match email prefixes and their result pages
+are cached briefly since they repeat on every keystroke.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import settings
+from app.fast_json import records
+from app.models import License, LicenseStatus
+from app.pagination import keyset_page, list_total
+
+MIN_TRIGRAM_LENGTH = 3
+
+_page_cache = TTLCache(ttl=settings.LICENSE_SEARCH_CACHE_SECONDS, max_size=1000)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(term: str):
+    """WHERE clause for a search term, shaped so one of the indexes applies"""
+    pattern = _escape_like(term)
+    if term.upper().startswith("LFT-"):
+        return License.human_key.like(f"{pattern.upper()}%", escape="\\")
+    if len(term) < MIN_TRIGRAM_LENGTH:
+        return License.owner_email.ilike(f"{pattern}%", escape="\\")
+    return or_(
+        License.owner_email.ilike(f"%{pattern}%", escape="\\"),
+        License.human_key.ilike(f"%{pattern}%", escape="\\")
+    )
+
+
+# Listed columns, selected as plain tuples and serialised by fast_json
+LIST_COLUMNS = (
+    License.id,
+    License.human_key,
+    License.owner_email,
+    License.plan,
+    License.status,
+    License.issued_at,
+    License.expires_at,
+    License.max_devices,
+)
+
+
+def search_licenses(
+    db: Session,
+    search: Optional[str],
+    status: Optional[str],
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    total_mode: str
+) -> Dict:
+    """
+    One page of licenses, newest first, with the cursor for the next page.
+    Search totals stop counting at LICENSE_SEARCH_COUNT_CAP.
+    """
+    term = (search or "").strip()
+    cache_key = None
+    if term and len(term) < MIN_TRIGRAM_LENGTH:
+        cache_key = f"{status}|{term.lower()}|{cursor}|{skip}|{limit}|{total_mode}"
+        cached = _page_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    query = db.query(License)
+    if status:
+        query = query.filter(License.status == LicenseStatus(status))
+    if term:
+        query = query.filter(search_filter(term))
+
+    if not term:
+        totals = list_total(db, query, total_mode, "licenses", f"licenses|{status}", filtered=bool(status))
+    elif total_mode == "none":
+        totals = {"total": None, "total_is_estimate": False}
+    else:
+        cap = settings.LICENSE_SEARCH_COUNT_CAP
+        capped = query.with_entities(License.id).limit(cap + 1).subquery()
+        total = db.execute(select(func.count()).select_from(capped)).scalar()
+        totals = {"total": min(total, cap), "total_is_estimate": False, "total_capped": total > cap}
+
+    # Offset paging is still accepted for old clients; cursors cost the same at any depth
+    query = query.with_entities(*LIST_COLUMNS)
+    if skip and not cursor:
+        query = query.offset(skip)
+    licenses, next_cursor = keyset_page(query, License.issued_at, License.id, cursor, limit)
+
+    result = {
+        **totals,
+        "next_cursor": next_cursor,
+        "licenses": records([column.key for column in LIST_COLUMNS], licenses)
+    }
+
+    if cache_key:
+        _page_cache.set(cache_key, result)
+    return result
@@ -0,0 +1,80 @@
+"""
+License Signing
+Signs license tokens with an RSA key (RS256) identified by a key id, and
+publishes the public keys as a JWKS so clients can verify licenses offline.
+The API refuses to start without a signing key. Legacy HS256 tokens signed
+with JWT_SECRET only verify while LICENSE_ACCEPT_HS256 is enabled, so the
+session secret can't mint licenses once existing ones are reissued.
+"""
+import logging
+from functools import lru_cache
+from typing import Dict
+
+from jose import JWTError, jwk, jwt
+from jose.exceptions import JWKError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "RS256"
+
+
+def _read_pem(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+@lru_cache(maxsize=1)
+def _signing_key() -> str:
+    if not settings.LICENSE_PRIVATE_KEY_FILE:
+        raise RuntimeError(
+            "LICENSE_PRIVATE_KEY_FILE is not set; generate a key with "
+            "python scripts/generate_license_keys.py and point the setting at it"
+        )
+    return _read_pem(settings.LICENSE_PRIVATE_KEY_FILE)
+
+
+@lru_cache(maxsize=1)
+def _public_keys() -> Dict[str, jwk.Key]:
+    """kid -> public key, for the signing key and any retired keys still trusted"""
+    keys = {settings.LICENSE_KEY_ID: jwk.construct(_signing_key(), ALGORITHM).public_key()}
+    for kid, path in settings.license_retired_public_keys.items():
+        keys[kid] = jwk.construct(_read_pem(path), ALGORITHM)
+    return keys
+
+
+def check_configuration() -> None:
+    """Load every key at startup so a missing or unreadable key fails the boot, not a request"""
+    try:
+        _public_keys()
+    except (OSError, JWKError) as e:
+        raise RuntimeError(f"License signing keys could not be loaded: {str(e)}") from e
+    if settings.LICENSE_ACCEPT_HS256:
+        logger.warning("LICENSE_ACCEPT_HS256 is enabled; licenses signed with JWT_SECRET still verify")
+
+
+def sign(payload: Dict) -> str:
+    return jwt.encode(payload, _signing_key(), algorithm=ALGORITHM, headers={"kid": settings.LICENSE_KEY_ID})
+
+
+def verify(token: str) -> Dict:
+    """Decode a license token signed by a published key (or a legacy HS256 token if allowed); raises JWTError"""
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == ALGORITHM:
+        key = _public_keys().get(header.get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=[ALGORITHM])
+    if not settings.LICENSE_ACCEPT_HS256:
+        raise JWTError("HS256 license tokens are no longer accepted")
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+
+def jwks() -> Dict:
+    return {
+        "keys": [
+            {**key.to_dict(), "kid": kid, "use": "sig", "alg": ALGORITHM}
+            for kid, key in _public_keys().items()
+        ]
+    }
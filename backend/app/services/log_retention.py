@@ -0,0 +1,251 @@
+"""
+Log Retention Service
+Maintains monthly partitions of logs / campaign_logs, rolls raw rows up into
+hourly and daily per-campaign counts, and drops partitions past retention.
+Months are UTC calendar months.
+"""
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> column that becomes the rollup "kind"
+PARTITIONED_TABLES = {
+    "logs": "status::text",
+    "campaign_logs": "log_type",
+}
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def day_floor(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _utc_trunc(unit: str, column: str) -> str:
+    """date_trunc in UTC; on a timestamptz it otherwise follows the session TimeZone"""
+    return f"timezone('UTC', date_trunc('{unit}', timezone('UTC', {column})))"
+
+
+def _bound(month: datetime) -> str:
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def list_partitions(conn: Connection, table: str) -> List[Tuple[str, datetime]]:
+    """Return (partition name, month start) for every monthly partition of table"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": table}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid
+            WHERE pg_class.relname = :table
+        )
+    """), {"table": table}).scalar()
+
+
+def _create_partition(conn: Connection, table: str, start: datetime) -> None:
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{_bound(start)}') TO ('{_bound(add_months(start, 1))}')"
+    ))
+
+
+def limit_lock_wait(conn: Connection) -> None:
+    """
+    Give up instead of queueing for a lock: DDL waiting behind a long read
+    would stall every query on the table that arrives after it
+    """
+    timeout_ms = int(settings.LOG_MAINTENANCE_LOCK_TIMEOUT_SECONDS * 1000)
+    conn.execute(text(f"SET LOCAL lock_timeout = '{timeout_ms}ms'"))
+
+
+def default_partition_months(conn: Connection, table: str) -> List[datetime]:
+    """UTC month starts the default partition holds rows for"""
+    default = default_partition_name(table)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is None:
+        return []
+    months = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', timestamp AT TIME ZONE 'UTC') FROM {default} "
+        f"WHERE timestamp IS NOT NULL"
+    )).scalars().all()
+    return sorted(month.replace(tzinfo=timezone.utc) for month in months)
+
+
+def rehome_month(conn: Connection, table: str, start: datetime) -> str:
+    """
+    Move one month of rows out of the default partition into a new monthly
+    partition, leaving the default attached. PostgreSQL refuses to create a
+    partition for a range the default holds rows in, so the month is built
+    as a plain table, filled by moving the rows across, and then attached;
+    its CHECK constraint lets the attach skip scanning it. The attach still
+    locks the default partition to check it, so run this in its own short
+    transaction after limit_lock_wait().
+    """
+    default = default_partition_name(table)
+    name = partition_name(table, start)
+    lower, upper = _bound(start), _bound(add_months(start, 1))
+    conn.execute(text(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS, "
+        f"CONSTRAINT {name}_bounds CHECK (timestamp >= '{lower}' AND timestamp < '{upper}'))"
+    ))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE timestamp >= '{lower}' AND timestamp < '{upper}' RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return name
+
+
+def ensure_partitions(conn: Connection, table: str, months_ahead: int, now: Optional[datetime] = None,
+                      skip: Iterable[datetime] = ()) -> None:
+    """
+    Create the partitions for the current month and the next months_ahead
+    months, except the skipped ones (still held by the default partition)
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    skip = set(skip)
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in skip:
+            _create_partition(conn, table, month)
+
+
+def rollup(conn: Connection, start: datetime, end: datetime) -> None:
+    """
+    Recompute hourly rollups for [start, end) from raw rows, then the daily
+    rollups for the (UTC) days touched. Both upserts overwrite counts, so re-running
+    a window is idempotent.
+    """
+    for table, kind in PARTITIONED_TABLES.items():
+        conn.execute(text(f"""
+            INSERT INTO log_rollups_hourly (source, campaign_id, bucket, kind, count)
+            SELECT '{table}', campaign_id, {_utc_trunc('hour', 'timestamp')}, {kind}, count(*)
+            FROM {table}
+            WHERE timestamp >= :start AND timestamp < :end
+            GROUP BY campaign_id, {_utc_trunc('hour', 'timestamp')}, {kind}
+            ON CONFLICT (source, campaign_id, bucket, kind) DO UPDATE SET count = EXCLUDED.count
+        """), {"start": start, "end": end})
+
+    day_start = day_floor(start)
+    conn.execute(text(f"""
+        INSERT INTO log_rollups_daily (source, campaign_id, bucket, kind, count)
+        SELECT source, campaign_id, {_utc_trunc('day', 'bucket')}, kind, sum(count)
+        FROM log_rollups_hourly
+        WHERE bucket >= :start AND bucket < :end
+        GROUP BY source, campaign_id, {_utc_trunc('day', 'bucket')}, kind
+        ON CONFLICT (source, campaign_id, bucket, kind) DO UPDATE SET count = EXCLUDED.count
+    """), {"start": day_start, "end": day_start + timedelta(days=((end - day_start).days + 1))})
+
+
+def drop_expired_partitions(conn: Connection, table: str, retention_months: int, now: Optional[datetime] = None) -> List[str]:
+    """Roll up and drop every monthly partition that ends before the retention cutoff"""
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    dropped = []
+    for name, start in list_partitions(conn, table):
+        end = add_months(start, 1)
+        if end > cutoff:
+            continue
+        # Make sure the statistics survive before the raw rows go away
+        rollup(conn, start, end)
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
+
+
+def run_maintenance() -> None:
+    """Periodic job: premake partitions, refresh recent rollups, enforce retention"""
+    if engine.dialect.name != "postgresql":
+        return
+
+    now = datetime.now(timezone.utc)
+    window_end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    window_start = window_end - timedelta(hours=settings.LOG_ROLLUP_LOOKBACK_HOURS + 1)
+
+    with engine.begin() as conn:
+        rollup(conn, window_start, window_end)
+
+    for table in PARTITIONED_TABLES:
+        with engine.connect() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            stranded = default_partition_months(conn, table)
+
+        # Rows only land in the default partition if maintenance fell behind or timestamps are far off
+        rehomed = []
+        for start in list(stranded):
+            try:
+                with engine.begin() as conn:
+                    limit_lock_wait(conn)
+                    rehomed.append(rehome_month(conn, table, start))
+                stranded.remove(start)
+            except OperationalError as e:
+                logger.error(
+                    f"Left {table} rows for {start:%Y-%m} in the default partition, "
+                    f"could not move them without waiting on locks: {str(e)}"
+                )
+        if rehomed:
+            logger.warning(f"Moved {table} rows out of the default partition into: {', '.join(rehomed)}")
+
+        # One short transaction per table keeps DDL locks brief
+        try:
+            with engine.begin() as conn:
+                limit_lock_wait(conn)
+                ensure_partitions(conn, table, settings.LOG_PARTITION_PREMAKE_MONTHS, now, skip=stranded)
+                dropped = drop_expired_partitions(conn, table, settings.LOG_RETENTION_MONTHS, now)
+        except OperationalError as e:
+            logger.error(f"Skipped {table} partition maintenance, tables were busy: {str(e)}")
+            continue
+        if dropped:
+            logger.info(f"Dropped expired {table} partitions: {', '.join(dropped)}")
+
+    # Daily rollups are kept indefinitely; hourly detail only for a while
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM log_rollups_hourly WHERE bucket < :cutoff"),
+            {"cutoff": day_floor(now) - timedelta(days=settings.LOG_ROLLUP_HOURLY_RETENTION_DAYS)}
+        )
@@ -0,0 +1,215 @@
+"""
+Buffered Log Writer
+Batches Log / CampaignLog rows in memory and writes them with multi-row inserts
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+
+from app.config import settings
+from app.database import engine
+from app.models import Log, MessageStatus
+from app.models_enhanced import CampaignLog
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed on stop() to wake the flusher thread
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Log sink that turns per-message inserts into batched Core inserts.
+
+    Entries are pushed onto a bounded queue. A background thread drains it and
+    flushes whenever a batch reaches ``batch_size`` rows or ``flush_interval``
+    seconds have passed. Producers never block: when the queue is full the
+    entry is dropped and counted in ``dropped``. A failed insert is retried
+    once; if the database is unreachable the batch goes back on the queue,
+    any other error (bad rows) drops it.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.LOG_BATCH_SIZE,
+        flush_interval: float = settings.LOG_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = settings.LOG_QUEUE_MAX_SIZE,
+        bind=None
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bind = bind or engine
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background flusher thread"""
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush everything still queued and stop the flusher thread"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            self._thread = None
+
+    def log(
+        self,
+        campaign_id: int,
+        status: MessageStatus,
+        contact_id: Optional[int] = None,
+        detail: Optional[str] = None
+    ) -> None:
+        """Queue a row for the ``logs`` table"""
+        self._enqueue(Log.__table__, {
+            "campaign_id": campaign_id,
+            "contact_id": contact_id,
+            "status": status,
+            "detail": detail,
+            "timestamp": datetime.utcnow()
+        })
+
+    def campaign_log(
+        self,
+        campaign_id: int,
+        log_type: str,
+        message: str,
+        contact_id: Optional[int] = None,
+        meta_data: Optional[Dict] = None
+    ) -> None:
+        """Queue a row for the ``campaign_logs`` table"""
+        self._enqueue(CampaignLog.__table__, {
+            "campaign_id": campaign_id,
+            "contact_id": contact_id,
+            "log_type": log_type,
+            "message": message,
+            "metadata": meta_data or {},
+            "timestamp": datetime.utcnow()
+        })
+
+    def flush(self) -> int:
+        """Synchronously write everything currently queued"""
+        written = 0
+        while True:
+            pending = self._drain(block=False)
+            if not pending:
+                return written
+            self._write(pending)
+            written += len(pending)
+
+    def _drop(self, count: int, reason: str) -> None:
+        previous = self.dropped
+        self.dropped += count
+        # Under sustained overload, log the first drop and then once per thousand
+        if previous == 0 or previous // 1000 != self.dropped // 1000:
+            logger.error(f"Dropping {count} log entries ({reason}); {self.dropped} dropped since start")
+
+    def _enqueue(self, table, row: Dict) -> None:
+        if not self.running:
+            # No flusher thread (scripts, tests): write through immediately
+            self._write([(table, row)])
+            return
+        # Called from request handlers, so never block the event loop
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self._drop(1, "queue full")
+
+    def _requeue(self, entries: List) -> None:
+        for requeued, entry in enumerate(entries):
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self._drop(len(entries) - requeued, "queue full while requeueing")
+                return
+
+    def _drain(self, block: bool = True) -> List:
+        """Collect up to batch_size entries, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    def _insert(self, entries: List) -> None:
+        # Group rows per table so each table gets one multi-row INSERT
+        grouped: Dict = {}
+        for table, row in entries:
+            grouped.setdefault(table, []).append(row)
+
+        with self.bind.begin() as conn:
+            for table, rows in grouped.items():
+                conn.execute(insert(table), rows)
+
+    def _write(self, entries: List) -> bool:
+        """Insert a batch, retrying once; False if it was requeued or dropped"""
+        if not entries:
+            return True
+
+        try:
+            self._insert(entries)
+            return True
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to write {len(entries)} log entries, retrying: {str(e)}")
+        try:
+            self._insert(entries)
+            return True
+        except (OperationalError, InterfaceError) as e:
+            if self.running and not self._stopping:
+                logger.error(f"Database unavailable, requeueing {len(entries)} log entries: {str(e)}")
+                self._requeue(entries)
+            else:
+                self._drop(len(entries), f"database unavailable: {str(e)}")
+        except SQLAlchemyError as e:
+            self._drop(len(entries), f"insert failed: {str(e)}")
+        return False
+
+    def _run(self) -> None:
+        self._stopping = False
+        while True:
+            batch = self._drain()
+            if not self._write(batch) and not self._stopping:
+                # Don't spin on a database that is down
+                time.sleep(self.flush_interval)
+            if self._stopping:
+                # Final flush of anything enqueued before the stop sentinel
+                self.flush()
+                self._stopping = False
+                return
+
+
+# Create singleton instance
+log_writer = LogWriter()
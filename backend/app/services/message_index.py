@@ -0,0 +1,106 @@
+"""
+Message Index
+Persists WhatsApp message id -> (user, campaign, contact, status) and keeps
+recent entries in Redis so status lookups are a single key read
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Campaign, CampaignStatus, Contact, MessageIndex, MessageStatus
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "wamsg:"
+
+
+def _cache_key(message_id: str) -> str:
+    return f"{CACHE_PREFIX}{message_id}"
+
+
+def _entry(message: MessageIndex) -> Dict:
+    return {
+        "message_id": message.message_id,
+        "user_id": message.user_id,
+        "campaign_id": message.campaign_id,
+        "contact_id": message.contact_id,
+        "status": message.status,
+        "timestamp": message.status_at.isoformat() if message.status_at else None,
+    }
+
+
+def cache_entries(entries: Iterable[Dict]) -> None:
+    """Write entries to the hot cache; cache failures never fail the caller"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for entry in entries:
+            pipe.set(_cache_key(entry["message_id"]), json.dumps(entry), ex=settings.MESSAGE_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Message cache write failed: {str(e)}")
+
+
+def record(
+    db: Session,
+    message_id: str,
+    user_id: int,
+    campaign_id: Optional[int] = None,
+    contact_id: Optional[int] = None,
+    commit: bool = True
+) -> Dict:
+    """
+    Store a freshly sent message; links the contact when it belongs to the
+    user's campaign. With commit=False the row is only added to the session:
+    the caller commits the batch and then passes the entries to cache_entries().
+    """
+    if contact_id is not None:
+        contact = db.query(Contact).join(Campaign).filter(
+            Contact.id == contact_id,
+            Campaign.user_id == user_id,
+            Campaign.status != CampaignStatus.DELETING
+        ).first()
+        if contact:
+            contact.provider_message_id = message_id
+            contact.status = MessageStatus.SENT
+            campaign_id = contact.campaign_id
+        else:
+            contact_id = None
+
+    message = MessageIndex(
+        message_id=message_id,
+        user_id=user_id,
+        campaign_id=campaign_id,
+        contact_id=contact_id,
+        status=MessageStatus.SENT.value,
+        status_at=datetime.utcnow()
+    )
+    db.add(message)
+    entry = _entry(message)
+    if commit:
+        db.commit()
+        cache_entries([entry])
+    return entry
+
+
+def get_status(db: Session, message_id: str) -> Optional[Dict]:
+    """Last known state of a message: one Redis GET, falling back to the unique index"""
+    try:
+        cached = redis_client.get(_cache_key(message_id))
+        if cached:
+            return json.loads(cached)
+    except redis.RedisError as e:
+        logger.warning(f"Message cache read failed: {str(e)}")
+
+    message = db.query(MessageIndex).filter(MessageIndex.message_id == message_id).first()
+    if not message:
+        return None
+
+    entry = _entry(message)
+    cache_entries([entry])
+    return entry
@@ -0,0 +1,224 @@
+"""
+WhatsApp Webhook Ingestion
+The webhook route only pushes raw payloads onto a Redis list; worker consumers
+pop them in batches and apply status transitions with bulk UPDATE ... FROM (VALUES ...)
+"""
+import hashlib
+import hmac
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.models import MessageStatus
+from app.redis_client import redis_client
+from app.services import message_index
+from app.services.log_writer import log_writer
+
+logger = logging.getLogger(__name__)
+
+# Statuses only ever move forward; a late "delivered" must not overwrite "read"
+STATUS_RANK = {
+    "sent": 1,
+    "delivered": 2,
+    "read": 3,
+    "failed": 4,
+}
+
+# Rank of the value currently stored, for contacts (enum names) and campaign_contacts (plain strings)
+_CONTACT_RANK_SQL = "CASE contacts.status WHEN 'SENT' THEN 1 WHEN 'DELIVERED' THEN 2 WHEN 'READ' THEN 3 WHEN 'FAILED' THEN 4 ELSE 0 END"
+_CAMPAIGN_CONTACT_RANK_SQL = "CASE campaign_contacts.status WHEN 'sent' THEN 1 WHEN 'delivered' THEN 2 WHEN 'read' THEN 3 WHEN 'failed' THEN 4 ELSE 0 END"
+_MESSAGE_INDEX_RANK_SQL = "CASE message_index.status WHEN 'sent' THEN 1 WHEN 'delivered' THEN 2 WHEN 'read' THEN 3 WHEN 'failed' THEN 4 ELSE 0 END"
+
+
+def verify_signature(payload: bytes, signature: Optional[str]) -> bool:
+    """Check X-Hub-Signature-256 when an app secret is configured"""
+    if not settings.WHATSAPP_APP_SECRET:
+        return True
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(settings.WHATSAPP_APP_SECRET.encode(), payload, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def enqueue(payload: bytes) -> None:
+    """Hand a raw webhook body to the consumers (raises redis.RedisError if Redis is down)"""
+    redis_client.rpush(settings.WEBHOOK_QUEUE_KEY, payload)
+
+
+def _normalize_status(status: Dict) -> Dict:
+    """Validate one status object and convert it to the columns apply_statuses writes"""
+    errors = status.get("errors") or []
+    if not isinstance(errors, list) or not all(isinstance(error, dict) for error in errors):
+        raise ValueError(f"Status {status['id']} has malformed errors")
+    error = errors[0] if errors else {}
+    timestamp = status.get("timestamp")
+    return {
+        "id": str(status["id"]),
+        "status": status["status"],
+        "ts": int(timestamp) if timestamp else int(datetime.utcnow().timestamp()),
+        "error_code": str(error["code"]) if error.get("code") is not None else None,
+        "error_message": error.get("title") or error.get("message"),
+    }
+
+
+def extract_statuses(payload: Dict) -> List[Dict]:
+    """
+    Pull the message status objects out of a WhatsApp Cloud API webhook
+    payload. Raises ValueError, TypeError or AttributeError if the payload is
+    malformed, so one bad payload never reaches the batched UPDATE.
+    """
+    statuses = []
+    for entry in payload.get("entry", []):
+        for change in entry.get("changes", []):
+            for status in change.get("value", {}).get("statuses", []):
+                if status.get("id") and status.get("status") in STATUS_RANK:
+                    statuses.append(_normalize_status(status))
+    return statuses
+
+
+def collapse_statuses(statuses: List[Dict]) -> List[Dict]:
+    """Keep only the most advanced status per message id within a batch"""
+    latest: Dict[str, Dict] = {}
+    for status in statuses:
+        current = latest.get(status["id"])
+        if current is None or STATUS_RANK[status["status"]] > STATUS_RANK[current["status"]]:
+            latest[status["id"]] = status
+    return list(latest.values())
+
+
+def _values_clause(updates: List[Dict], params: Dict) -> str:
+    rows = []
+    for i, update in enumerate(updates):
+        params.update({
+            f"id_{i}": update["id"],
+            f"status_{i}": update["status"],
+            f"rank_{i}": STATUS_RANK[update["status"]],
+            f"ts_{i}": update["ts"],
+            f"code_{i}": update["error_code"],
+            f"error_{i}": update["error_message"],
+        })
+        rows.append(f"(:id_{i}, :status_{i}, :rank_{i}, :ts_{i}, :code_{i}, :error_{i})")
+    return ", ".join(rows)
+
+
+def apply_statuses(conn, updates: List[Dict]) -> Tuple[List, List, List]:
+    """
+    Apply a batch of status transitions to the message index and both contact
+    tables. Returns the changed message_index, contacts and campaign_contacts
+    rows; hand them to publish_statuses() once the transaction has committed.
+    """
+    if not updates:
+        return [], [], []
+
+    params: Dict = {}
+    values = _values_clause(updates, params)
+    source = f"(VALUES {values}) AS v(message_id, status, rank, ts, error_code, error_message)"
+
+    indexed_rows = conn.execute(text(f"""
+        UPDATE message_index
+        SET status = v.status, status_at = to_timestamp(v.ts)
+        FROM {source}
+        WHERE message_index.message_id = v.message_id
+          AND {_MESSAGE_INDEX_RANK_SQL} < v.rank
+        RETURNING message_index.message_id, message_index.user_id, message_index.campaign_id,
+                  message_index.contact_id, message_index.status, message_index.status_at
+    """), params).all()
+
+    contact_rows = conn.execute(text(f"""
+        UPDATE contacts
+        SET status = CAST(upper(v.status) AS messagestatus)
+        FROM {source}
+        WHERE contacts.provider_message_id = v.message_id
+          AND {_CONTACT_RANK_SQL} < v.rank
+        RETURNING contacts.id, contacts.campaign_id, v.status, v.error_message
+    """), params).all()
+
+    campaign_contact_rows = conn.execute(text(f"""
+        UPDATE campaign_contacts
+        SET status = v.status,
+            sent_at = CASE WHEN v.status <> 'failed'
+                THEN COALESCE(campaign_contacts.sent_at, to_timestamp(v.ts))
+                ELSE campaign_contacts.sent_at END,
+            delivered_at = CASE WHEN v.status IN ('delivered', 'read')
+                THEN COALESCE(campaign_contacts.delivered_at, to_timestamp(v.ts))
+                ELSE campaign_contacts.delivered_at END,
+            read_at = CASE WHEN v.status = 'read' THEN to_timestamp(v.ts) ELSE campaign_contacts.read_at END,
+            failed_at = CASE WHEN v.status = 'failed' THEN to_timestamp(v.ts) ELSE campaign_contacts.failed_at END,
+            error_code = CASE WHEN v.status = 'failed' THEN v.error_code ELSE campaign_contacts.error_code END,
+            error_message = CASE WHEN v.status = 'failed' THEN v.error_message ELSE campaign_contacts.error_message END
+        FROM {source}
+        WHERE campaign_contacts.provider_message_id = v.message_id
+          AND {_CAMPAIGN_CONTACT_RANK_SQL} < v.rank
+        RETURNING campaign_contacts.id, campaign_contacts.campaign_id, v.status, v.error_message
+    """), params).all()
+
+    return indexed_rows, contact_rows, campaign_contact_rows
+
+
+def publish_statuses(indexed_rows: List, contact_rows: List, campaign_contact_rows: List) -> None:
+    """Refresh the status cache and log the transitions apply_statuses() committed"""
+    # Keep the hot status cache in step with the database
+    message_index.cache_entries({
+        "message_id": row.message_id,
+        "user_id": row.user_id,
+        "campaign_id": row.campaign_id,
+        "contact_id": row.contact_id,
+        "status": row.status,
+        "timestamp": row.status_at.isoformat(),
+    } for row in indexed_rows)
+
+    # Transition history goes through the buffered log writer
+    for contact_id, campaign_id, status, error in contact_rows:
+        log_writer.log(campaign_id, MessageStatus(status), contact_id=contact_id, detail=error)
+    for contact_id, campaign_id, status, error in campaign_contact_rows:
+        log_writer.campaign_log(
+            campaign_id,
+            "error" if status == "failed" else "info",
+            error or f"Message {status}",
+            contact_id=contact_id
+        )
+
+
+def consume_batch(timeout: int = 1) -> int:
+    """
+    Pop up to WEBHOOK_BATCH_SIZE payloads and apply them in one transaction.
+    Malformed payloads go to the dead-letter list; the valid ones are pushed
+    back onto the queue if the database write fails. The cache and the logs
+    are only touched after the commit, so a retried batch can't leave Redis
+    ahead of the database or log a transition twice.
+    """
+    first = redis_client.blpop([settings.WEBHOOK_QUEUE_KEY], timeout=timeout)
+    if not first:
+        return 0
+    popped = [first[1]] + (redis_client.lpop(settings.WEBHOOK_QUEUE_KEY, settings.WEBHOOK_BATCH_SIZE - 1) or [])
+
+    payloads = []
+    statuses = []
+    for raw in popped:
+        try:
+            statuses.extend(extract_statuses(json.loads(raw)))
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            logger.warning(f"Moving malformed webhook payload to {settings.WEBHOOK_DEAD_LETTER_KEY}: {str(e)}")
+            redis_client.rpush(settings.WEBHOOK_DEAD_LETTER_KEY, raw)
+            continue
+        payloads.append(raw)
+
+    try:
+        with engine.begin() as conn:
+            applied = apply_statuses(conn, collapse_statuses(statuses))
+    except Exception:
+        try:
+            if payloads:
+                redis_client.rpush(settings.WEBHOOK_QUEUE_KEY, *payloads)
+        except redis.RedisError:
+            logger.error(f"Lost {len(payloads)} webhook payloads after a failed apply")
+        raise
+
+    publish_statuses(*applied)
+    return len(statuses)
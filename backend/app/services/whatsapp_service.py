@@ -5,7 +5,6 @@ Handles sending messages via WhatsApp Business API
 import requests
 import logging
 from typing import Dict, List, Optional
-from datetime import datetime
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -242,24 +241,6 @@ class WhatsAppService:
             components=components
         )
     
-    def get_message_status(self, message_id: str) -> Dict:
-        """
-        Get the status of a sent message
-        
-        Args:
-            message_id: WhatsApp message ID
-            
-        Returns:
-            Message status information
-        """
-        # Note: WhatsApp uses webhooks for status updates
-        # This is a placeholder for webhook handling
-        return {
-            "message_id": message_id,
-            "status": "sent",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-    
     def validate_phone_number(self, phone: str) -> bool:
         """
         Validate phone number format
@@ -0,0 +1,82 @@
+"""
+Background Worker
+Runs periodic maintenance jobs outside the API process: python -m app.worker
+"""
+import logging
+import signal
+import threading
+from typing import Callable, List
+
+from app.config import settings
+from app.services import (
+    admin_stats, campaign_cleanup, daily_rollups, delivery_analytics, license_expiry, license_heartbeats,
+    log_retention, webhook_ingest
+)
+from app.services.log_writer import log_writer
+
+logger = logging.getLogger("app.worker")
+
+
+class PeriodicJob:
+    """Runs a callable every `interval` seconds in its own thread until stopped"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+
+    def run(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                self.func()
+            except Exception as e:
+                logger.exception(f"Job {self.name} failed: {str(e)}")
+                # Back off instead of spinning when a dependency is down
+                stop_event.wait(max(self.interval, 1.0))
+                continue
+            stop_event.wait(self.interval)
+
+
+def build_jobs() -> List[PeriodicJob]:
+    jobs = [
+        PeriodicJob("log-maintenance", settings.LOG_MAINTENANCE_INTERVAL_SECONDS, log_retention.run_maintenance),
+        PeriodicJob("campaign-purge", settings.CAMPAIGN_PURGE_INTERVAL_SECONDS, campaign_cleanup.purge_deleted_campaigns),
+        PeriodicJob("delivery-analytics", settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS, delivery_analytics.run_rollup),
+        PeriodicJob("license-heartbeats", settings.LICENSE_HEARTBEAT_FLUSH_SECONDS, license_heartbeats.flush),
+        PeriodicJob("license-expiry", settings.LICENSE_EXPIRY_SWEEP_SECONDS, license_expiry.sweep),
+        PeriodicJob("daily-rollups", settings.DAILY_ROLLUP_INTERVAL_SECONDS, daily_rollups.run_rebuild),
+        PeriodicJob("admin-stats", settings.ADMIN_STATS_RECONCILE_SECONDS, admin_stats.reconcile),
+    ]
+    # Consumers block on the queue themselves, so they loop without a pause
+    for i in range(settings.WEBHOOK_CONSUMERS):
+        jobs.append(PeriodicJob(f"webhook-consumer-{i}", 0, webhook_ingest.consume_batch))
+    return jobs
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info("Shutting down worker")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    log_writer.start()
+    threads = []
+    for job in build_jobs():
+        thread = threading.Thread(target=job.run, args=(stop_event,), name=job.name, daemon=True)
+        thread.start()
+        threads.append(thread)
+        logger.info(f"Started job {job.name} (every {job.interval}s)")
+
+    stop_event.wait()
+    for thread in threads:
+        thread.join(timeout=30)
+    log_writer.stop()
+
+
+if __name__ == "__main__":
+    main()
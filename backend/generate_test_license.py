@@ -1,9 +1,8 @@
 """Generate a test license for immediate use"""
 import sys
 from datetime import datetime, timedelta
-from jose import jwt
-from app.config import settings
 from app.database import SessionLocal
+from app.services import license_signing
 from app.models import License, LicenseStatus
 import uuid
 import secrets
@@ -24,7 +23,7 @@ def create_license_token(license_id, owner_email, plan, expires_at, max_devices)
         "max_devices": max_devices,
         "type": "license"
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return license_signing.sign(payload)
 
 # Create license
 db = SessionLocal()
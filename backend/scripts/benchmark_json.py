@@ -0,0 +1,68 @@
+"""
+Compare serialising a large list response the old way (ORM-style objects,
+.isoformat() per field, jsonable_encoder, json.dumps) with the fast path
+(column tuples straight into orjson). Usage: python scripts/benchmark_json.py [rows]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.fast_json import dumps, records  # noqa: E402
+from app.models import MessageStatus  # noqa: E402
+
+FIELDS = ("id", "name", "phone", "custom", "status", "created_at")
+
+
+def make_rows(count: int):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        (i, f"Contact {i}", f"91987{i:07d}", {"city": "Mumbai", "tier": "gold"}, MessageStatus.SENT, start + timedelta(seconds=i))
+        for i in range(count)
+    ]
+
+
+def before(rows) -> bytes:
+    contacts = [SimpleNamespace(**dict(zip(FIELDS, row))) for row in rows]
+    payload = [
+        {
+            "id": contact.id,
+            "name": contact.name,
+            "phone": contact.phone,
+            "custom": contact.custom,
+            "status": contact.status.value,
+            "created_at": contact.created_at.isoformat()
+        } for contact in contacts
+    ]
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+
+def after(rows) -> bytes:
+    return dumps(records(FIELDS, rows))
+
+
+def timed(fn, rows, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(count)
+    assert json.loads(before(rows)) == json.loads(after(rows))
+    
+    slow = timed(before, rows)
+    fast = timed(after, rows)
+    print(f"{count} rows")
+    print(f"before: {slow * 1000:8.1f} ms")
+    print(f"after:  {fast * 1000:8.1f} ms  ({slow / fast:.1f}x faster)")
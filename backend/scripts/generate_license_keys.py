@@ -0,0 +1,31 @@
+"""Generate an RSA key pair for signing license tokens"""
+import sys
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def generate(private_path: str, public_path: str) -> None:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    
+    with open(private_path, "wb") as f:
+        f.write(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+    
+    with open(public_path, "wb") as f:
+        f.write(key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ))
+    
+    print(f"Private key: {private_path} (set LICENSE_PRIVATE_KEY_FILE)")
+    print(f"Public key:  {public_path} (list in LICENSE_RETIRED_PUBLIC_KEYS once rotated out)")
+
+
+if __name__ == "__main__":
+    private_path = sys.argv[1] if len(sys.argv) > 1 else "license_private.pem"
+    public_path = sys.argv[2] if len(sys.argv) > 2 else "license_public.pem"
+    generate(private_path, public_path)
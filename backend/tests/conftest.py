@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.config import settings
+
+
+def _write_test_signing_key() -> str:
+    """License signing needs an RSA key; generate a throwaway one unless one is configured"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    fd, path = tempfile.mkstemp(suffix=".pem")
+    with os.fdopen(fd, "wb") as f:
+        f.write(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+    return path
+
+
+if not settings.LICENSE_PRIVATE_KEY_FILE:
+    settings.LICENSE_PRIVATE_KEY_FILE = _write_test_signing_key()
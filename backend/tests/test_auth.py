@@ -1,7 +1,13 @@
+import threading
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.database import Base, engine, get_db
+from app.auth import invalidate_user_cache
+from app.cache import TTLCache
+from app.config import settings
+from passlib.hash import bcrypt
+from app.models import User
 from sqlalchemy.orm import sessionmaker
 
 # Test database
@@ -103,3 +109,55 @@ def test_refresh_token(setup_database):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
+
+
+def test_current_user_cached_until_invalidated(setup_database):
+    """Test authenticated requests use the user cache until it is invalidated"""
+    login_response = client.post(
+        "/api/v1/auth/login",
+        json={"email": "test@example.com", "password": "testpass123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    
+    # Deactivate behind the cache's back; the cached entry still authenticates
+    db = TestingSessionLocal()
+    db.query(User).filter(User.email == "test@example.com").update({"is_active": False})
+    db.commit()
+    db.close()
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+    
+    invalidate_user_cache("test@example.com")
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 403
+
+
+def test_user_cache_bypassed_while_unsubscribed(monkeypatch):
+    """A started process that lost its invalidation subscription stops trusting its local copy"""
+    cache = TTLCache(ttl=60, invalidation_channel="authuser:test")
+    cache.set("user@example.com", {"is_active": True})
+    assert cache.get("user@example.com") == {"is_active": True}
+    
+    monkeypatch.setattr(cache, "_thread", threading.Thread(target=lambda: None))
+    assert cache.get("user@example.com") is None
+    
+    cache._listening.set()
+    cache.set("user@example.com", {"is_active": False})
+    assert cache.get("user@example.com") == {"is_active": False}
+
+
+def test_login_rehashes_outdated_password(setup_database):
+    """Test login upgrades a hash made with a lower bcrypt cost"""
+    db = TestingSessionLocal()
+    db.add(User(email="legacy@example.com", password_hash=bcrypt.using(rounds=4).hash("legacypass")))
+    db.commit()
+    
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": "legacy@example.com", "password": "legacypass"}
+    )
+    assert response.status_code == 200
+    
+    db.expire_all()
+    user = db.query(User).filter(User.email == "legacy@example.com").first()
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    db.close()
@@ -0,0 +1,135 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import Base, engine, get_db
+from app.models import Campaign, Contact, Log, MessageStatus
+from app.services.campaign_cleanup import purge_campaign
+from sqlalchemy.orm import sessionmaker
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user_token(setup_database):
+    """Register a user and return an access token"""
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "campaigns@test.com", "password": "testpass123"}
+    )
+    if response.status_code != 200:
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "campaigns@test.com", "password": "testpass123"}
+        )
+    return response.json()["access_token"]
+
+
+def create_campaign_with_contacts(token, count):
+    headers = {"Authorization": f"Bearer {token}"}
+    campaign = client.post(
+        "/api/v1/campaigns",
+        headers=headers,
+        json={"name": "Launch", "template": "Hi {name}"}
+    ).json()
+    client.post(
+        f"/api/v1/campaigns/{campaign['id']}/contacts",
+        headers=headers,
+        json=[{"name": f"Contact {i}", "phone": f"91987654{i:04d}"} for i in range(count)]
+    )
+    return campaign
+
+
+def test_delete_campaign_marks_deleting(user_token):
+    """Deleting returns immediately and hides the campaign"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    campaign = create_campaign_with_contacts(user_token, 5)
+    
+    response = client.delete(f"/api/v1/campaigns/{campaign['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "deleting"
+    
+    listed = client.get("/api/v1/campaigns", headers=headers).json()
+    assert campaign["id"] not in [c["id"] for c in listed]
+    
+    response = client.get(f"/api/v1/campaigns/{campaign['id']}/status", headers=headers)
+    assert response.status_code == 404
+
+
+def test_list_campaigns_conditional_get(user_token):
+    """Unchanged lists answer If-None-Match with 304; a write changes the ETag"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.get("/api/v1/campaigns", headers=headers)
+    etag = response.headers["etag"]
+    
+    response = client.get("/api/v1/campaigns", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    
+    create_campaign_with_contacts(user_token, 1)
+    response = client.get("/api/v1/campaigns", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_purge_campaign_removes_rows_in_chunks(user_token):
+    """The background purge removes contacts, logs and the campaign"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    campaign = create_campaign_with_contacts(user_token, 25)
+    
+    db = TestingSessionLocal()
+    contact_ids = [c.id for c in db.query(Contact).filter(Contact.campaign_id == campaign["id"])]
+    for contact_id in contact_ids:
+        db.add(Log(campaign_id=campaign["id"], contact_id=contact_id, status=MessageStatus.SENT))
+    db.commit()
+    
+    client.delete(f"/api/v1/campaigns/{campaign['id']}", headers=headers)
+    purge_campaign(campaign["id"], chunk_size=7, throttle=0)
+    
+    assert db.query(Contact).filter(Contact.campaign_id == campaign["id"]).count() == 0
+    assert db.query(Log).filter(Log.campaign_id == campaign["id"]).count() == 0
+    assert db.query(Campaign).filter(Campaign.id == campaign["id"]).first() is None
+    db.close()
+
+
+def test_filter_contacts_by_segment(user_token):
+    """Segments select contacts by custom attributes"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    campaign = client.post("/api/v1/campaigns", headers=headers, json={"name": "Segmented", "template": "Hi"}).json()
+    client.post(
+        f"/api/v1/campaigns/{campaign['id']}/contacts",
+        headers=headers,
+        json=[
+            {"name": "A", "phone": "919800000001", "custom": {"city": "Mumbai", "tier": "gold"}},
+            {"name": "B", "phone": "919800000002", "custom": {"city": "Mumbai", "tier": "bronze"}},
+            {"name": "C", "phone": "919800000003", "custom": {"city": "New Delhi", "tier": "silver"}},
+        ]
+    )
+    url = f"/api/v1/campaigns/{campaign['id']}/contacts"
+    
+    def names(segment):
+        response = client.get(url, params={"segment": segment}, headers=headers)
+        assert response.status_code == 200
+        return sorted(c["name"] for c in response.json())
+    
+    assert names("city=Mumbai AND tier in (gold, silver)") == ["A"]
+    assert names("city = 'New Delhi'") == ["C"]
+    assert names("tier not in (gold, silver)") == ["B"]
+    assert client.get(url, params={"segment": "city in Mumbai"}, headers=headers).status_code == 400
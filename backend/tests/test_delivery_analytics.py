@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, engine
+from app.models import User
+from app.models_enhanced import CampaignContact, CampaignEnhanced, CampaignErrorStats
+from app.services import delivery_analytics
+
+# The rollup SQL (date_trunc, width_bucket) is PostgreSQL only
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="PostgreSQL rollup")
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_error_counts_survive_the_window_moving_past_the_send_hour(db):
+    """A message sent before the window start that failed inside it keeps its error row"""
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    user = User(email="analytics@test.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    campaign = CampaignEnhanced(name="Window edge", user_id=user.id)
+    db.add(campaign)
+    db.flush()
+    db.add(CampaignContact(
+        campaign_id=campaign.id,
+        phone="919876540000",
+        sent_at=hour - timedelta(hours=1),
+        failed_at=hour + timedelta(minutes=5),
+        error_code="131026"
+    ))
+    db.commit()
+    
+    delivery_analytics.rollup(hour - timedelta(hours=2))
+    delivery_analytics.rollup(hour)
+    
+    errors = db.query(CampaignErrorStats).filter(CampaignErrorStats.campaign_id == campaign.id).all()
+    assert [(e.error_code, e.count, e.hour) for e in errors] == [("131026", 1, hour - timedelta(hours=1))]
+    assert delivery_analytics.campaign_summary(db, campaign.id)["errors"] == [{"code": "131026", "count": 1}]
@@ -0,0 +1,24 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.fast_json import dumps, records
+from app.models import MessageStatus
+
+
+def test_matches_isoformat_encoding():
+    """Native values serialise to the text the endpoints used to build by hand"""
+    naive = datetime(2026, 10, 19, 8, 30, 0, 125000)
+    aware = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+    row = {"at": naive, "utc": aware, "status": MessageStatus.SENT, "amount": Decimal("9.99")}
+    
+    assert json.loads(dumps(row)) == {
+        "at": naive.isoformat(),
+        "utc": aware.isoformat(),
+        "status": MessageStatus.SENT.value,
+        "amount": 9.99
+    }
+
+
+def test_records_names_tuple_columns():
+    assert records(("id", "name"), [(1, "a"), (2, "b")]) == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
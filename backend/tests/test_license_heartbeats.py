@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+import redis
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, engine
+from app.models import Device, License
+from app.redis_client import redis_client
+from app.services import license_heartbeats
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module")
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def buffers(monkeypatch):
+    """Point the heartbeat buffers at throwaway keys (needs Redis)"""
+    try:
+        redis_client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis not available")
+    device_key, license_key = "test:heartbeat:devices", "test:heartbeat:licenses"
+    monkeypatch.setattr(license_heartbeats, "DEVICE_KEY", device_key)
+    monkeypatch.setattr(license_heartbeats, "LICENSE_KEY", license_key)
+    keys = [key + suffix for key in (device_key, license_key) for suffix in ("", license_heartbeats._FLUSHING_SUFFIX)]
+    redis_client.delete(*keys)
+    yield device_key, license_key
+    redis_client.delete(*keys)
+
+
+@pytest.fixture
+def device(setup_database):
+    """A license with one device, both last seen long ago"""
+    db = TestingSessionLocal()
+    long_ago = datetime(2020, 1, 1)
+    license = License(token=f"token-{time.time_ns()}", owner_email="beat@test.com", plan="basic",
+                      expires_at=datetime(2030, 1, 1), last_validated=long_ago)
+    db.add(license)
+    db.flush()
+    device = Device(license_id=license.id, hwid="hwid-beat", last_seen=long_ago)
+    db.add(device)
+    db.commit()
+    ids = (license.id, device.id)
+    db.close()
+    return ids
+
+
+def utc(value: datetime) -> datetime:
+    # SQLite hands back the naive UTC values the flush wrote
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def stored(license_id, device_id):
+    db = TestingSessionLocal()
+    license = db.get(License, license_id)
+    device = db.get(Device, device_id)
+    db.close()
+    return utc(license.last_validated), utc(device.last_seen)
+
+
+def test_flush_writes_buffered_heartbeats(buffers, device):
+    """Buffered timestamps land on the license and device, and the buffers are emptied"""
+    license_id, device_id = device
+    now = time.time()
+    asyncio.run(license_heartbeats.record(license_id, device_id))
+    
+    license_heartbeats.flush()
+    
+    last_validated, last_seen = stored(license_id, device_id)
+    assert abs(last_validated.timestamp() - now) < 5
+    assert abs(last_seen.timestamp() - now) < 5
+    assert not redis_client.exists(*[key + suffix for key in buffers for suffix in ("", license_heartbeats._FLUSHING_SUFFIX)])
+
+
+def test_heartbeat_during_flush_is_kept_for_the_next_one(buffers, device, monkeypatch):
+    """The hash is renamed aside before reading, so heartbeats arriving mid-flush survive"""
+    license_id, device_id = device
+    apply = license_heartbeats._apply
+    arrived = []
+    
+    def apply_with_heartbeat(conn, table, column, rows):
+        if not arrived:
+            asyncio.run(license_heartbeats.record(license_id, device_id))
+            arrived.append(True)
+        apply(conn, table, column, rows)
+    monkeypatch.setattr(license_heartbeats, "_apply", apply_with_heartbeat)
+    
+    redis_client.hset(buffers[0], str(device_id), time.time() - 60)
+    license_heartbeats.flush()
+    
+    # The device hash was already renamed aside, so the new heartbeat waits in a fresh one
+    assert redis_client.hexists(buffers[0], str(device_id))
+    license_heartbeats.flush()
+    assert not redis_client.exists(buffers[0])
+
+
+def test_leftover_flushing_key_is_retried_first(buffers, device):
+    """A crashed flush leaves ':flushing' behind; the next flush applies it before new heartbeats"""
+    license_id, device_id = device
+    leftover = time.time() - 30
+    redis_client.hset(buffers[1] + license_heartbeats._FLUSHING_SUFFIX, license_id, leftover)
+    redis_client.hset(buffers[1], license_id, time.time())
+    
+    license_heartbeats.flush()
+    
+    assert abs(stored(license_id, device_id)[0].timestamp() - leftover) < 1
+    assert redis_client.hexists(buffers[1], license_id)
+    
+    license_heartbeats.flush()
+    assert stored(license_id, device_id)[0].timestamp() > leftover + 1
+    assert not redis_client.exists(buffers[1])
+
+
+def test_older_heartbeat_never_overwrites_newer(setup_database, device):
+    """The guarded update keeps whichever timestamp is newer"""
+    license_id, device_id = device
+    newer, older = time.time(), time.time() - 3600
+    with engine.begin() as conn:
+        license_heartbeats._apply(conn, Device.__table__, "last_seen", [(device_id, newer)])
+        license_heartbeats._apply(conn, Device.__table__, "last_seen", [(device_id, older)])
+    
+    assert abs(stored(license_id, device_id)[1].timestamp() - newer) < 1
+
+
+class DownRedis:
+    """Redis stand-in that is unreachable"""
+    
+    def pipeline(self, transaction=True):
+        raise redis.ConnectionError("Redis is down")
+
+
+def test_heartbeat_without_redis_writes_off_the_event_loop(device, monkeypatch):
+    """The direct fallback runs in the threadpool, so a Redis outage doesn't stall other requests"""
+    license_id, device_id = device
+    apply = license_heartbeats._apply
+    threads = []
+    
+    def apply_recording_thread(conn, table, column, rows):
+        threads.append(threading.current_thread())
+        apply(conn, table, column, rows)
+    monkeypatch.setattr(license_heartbeats, "_apply", apply_recording_thread)
+    monkeypatch.setattr(license_heartbeats, "redis_client", DownRedis())
+    
+    now = time.time()
+    asyncio.run(license_heartbeats.record(license_id, device_id))
+    
+    assert threads and threading.main_thread() not in threads
+    last_validated, last_seen = stored(license_id, device_id)
+    assert abs(last_validated.timestamp() - now) < 5
+    assert abs(last_seen.timestamp() - now) < 5
@@ -1,9 +1,17 @@
+import base64
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi.testclient import TestClient
+from jose import JWTError, jwt
 from app.main import app
 from app.database import Base, engine, get_db
-from app.models import User, UserRole
+from app.models import User, UserRole, Reseller, License, LicenseStatus
 from app.auth import get_password_hash
+from app.services.license_cache import LicenseCache
+from app.config import settings
+from app.services import daily_rollups, license_expiry, license_signing
+from datetime import date, datetime, timedelta, timezone
 from sqlalchemy.orm import sessionmaker
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -126,3 +134,282 @@ def test_revoke_license(admin_token):
     )
     assert response.status_code == 200
     assert response.json()["success"] is True
+
+
+def test_license_details_conditional_get(admin_token):
+    """Revoking a license invalidates its cached details"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    license_data = test_generate_license(admin_token)
+    url = f"/api/v1/licenses/{license_data['license_id']}"
+    
+    etag = client.get(url, headers=headers).headers["etag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    
+    client.post(f"/api/v1/licenses/revoke/{license_data['license_id']}", headers=headers)
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["status"] == "revoked"
+
+
+def test_reseller_list_conditional_get(admin_token):
+    """Creating a reseller invalidates the cached reseller list"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = client.get("/api/v1/admin/resellers", headers=headers).headers["etag"]
+    assert client.get("/api/v1/admin/resellers", headers={**headers, "If-None-Match": etag}).status_code == 304
+    
+    client.post(
+        "/api/v1/admin/resellers",
+        headers=headers,
+        json={"email": "listed-reseller@test.com", "password": "reseller123", "name": "Listed"}
+    )
+    response = client.get("/api/v1/admin/resellers", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert "listed-reseller@test.com" in [r["email"] for r in response.json()["resellers"]]
+
+
+def test_license_cache_invalidation():
+    """Test cached validation results are dropped on invalidation"""
+    cache = LicenseCache(ttl=60, max_size=100)
+    cache._listening.set()
+    
+    cache.set("lic-1", "hwid-a", {"device_id": 1}, cache.generation)
+    assert cache.get("lic-1", "hwid-a") == {"device_id": 1}
+    assert cache.get("lic-1", "hwid-b") is None
+    
+    cache.invalidate("lic-1")
+    assert cache.get("lic-1", "hwid-a") is None
+
+
+def test_license_cache_skips_stale_results():
+    """Test a result read before an invalidation is not cached"""
+    cache = LicenseCache(ttl=60, max_size=100)
+    cache._listening.set()
+    
+    generation = cache.generation
+    cache.invalidate("lic-1")
+    cache.set("lic-1", "hwid-a", {"device_id": 1}, generation)
+    assert cache.get("lic-1", "hwid-a") is None
+    
+    # Without a live subscription nothing is served from memory
+    cache._listening.clear()
+    cache.set("lic-1", "hwid-a", {"device_id": 1}, cache.generation)
+    assert cache.get("lic-1", "hwid-a") is None
+
+
+def test_license_jwks_is_public():
+    """Test the JWKS endpoint is reachable without authentication"""
+    response = client.get("/api/v1/licenses/jwks.json")
+    assert response.status_code == 200
+    assert [key["kid"] for key in response.json()["keys"]] == [settings.LICENSE_KEY_ID]
+
+
+@pytest.fixture
+def signing_key(tmp_path, monkeypatch):
+    """A fresh RSA signing key, with the key caches reset around the test"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    path = tmp_path / "license_private.pem"
+    path.write_bytes(key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ))
+    monkeypatch.setattr(settings, "LICENSE_PRIVATE_KEY_FILE", str(path))
+    monkeypatch.setattr(settings, "LICENSE_KEY_ID", "test-key")
+    license_signing._signing_key.cache_clear()
+    license_signing._public_keys.cache_clear()
+    yield key
+    license_signing._signing_key.cache_clear()
+    license_signing._public_keys.cache_clear()
+
+
+def b64url_uint(value: int) -> str:
+    return base64.urlsafe_b64encode(value.to_bytes((value.bit_length() + 7) // 8, "big")).rstrip(b"=").decode()
+
+
+def test_license_signing_round_trip(signing_key):
+    """Tokens are RS256 with the key id, verify, and match the published JWKS"""
+    token = license_signing.sign({"license_id": "lic-1"})
+    
+    assert jwt.get_unverified_header(token) == {"alg": "RS256", "kid": "test-key", "typ": "JWT"}
+    assert license_signing.verify(token)["license_id"] == "lic-1"
+    
+    numbers = signing_key.public_key().public_numbers()
+    (published,) = license_signing.jwks()["keys"]
+    assert published["kid"] == "test-key"
+    assert published["n"] == b64url_uint(numbers.n)
+    assert published["e"] == b64url_uint(numbers.e)
+
+
+def test_legacy_hs256_licenses_rejected_by_default(signing_key, monkeypatch):
+    """The session secret can't mint licenses unless legacy tokens are explicitly allowed"""
+    legacy = jwt.encode({"license_id": "lic-1"}, settings.JWT_SECRET, algorithm="HS256")
+    
+    with pytest.raises(JWTError):
+        license_signing.verify(legacy)
+    
+    monkeypatch.setattr(settings, "LICENSE_ACCEPT_HS256", True)
+    assert license_signing.verify(legacy)["license_id"] == "lic-1"
+
+
+def test_startup_fails_without_signing_key(signing_key, monkeypatch):
+    """A missing key stops the API at boot instead of failing the first license request"""
+    monkeypatch.setattr(settings, "LICENSE_PRIVATE_KEY_FILE", "")
+    
+    with pytest.raises(RuntimeError):
+        license_signing.check_configuration()
+
+
+def test_generate_batch_charges_reseller_quota(setup_database):
+    """Test batch generation streams CSV and never overdraws the reseller quota"""
+    db = TestingSessionLocal()
+    user = User(email="reseller@test.com", password_hash=get_password_hash("reseller123"), role=UserRole.RESELLER)
+    db.add(user)
+    db.flush()
+    db.add(Reseller(user_id=user.id, name="Reseller", quota=5, used_quota=0))
+    db.commit()
+    
+    token = client.post(
+        "/api/v1/auth/login",
+        json={"email": "reseller@test.com", "password": "reseller123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    batch = {"owner_email": "buyer@test.com", "plan": "basic", "days": 30, "count": 3}
+    
+    response = client.post("/api/v1/licenses/generate-batch", json=batch, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.strip().splitlines()
+    assert len(lines) == 4
+    assert lines[0].startswith("license_id,human_key,token")
+    
+    # Only 2 of the 5 remain, so a second batch of 3 is refused as a whole
+    response = client.post("/api/v1/licenses/generate-batch", json=batch, headers=headers)
+    assert response.status_code == 403
+    
+    db.expire_all()
+    assert db.query(Reseller).filter(Reseller.user_id == user.id).first().used_quota == 3
+    assert db.query(License).filter(License.owner_email == "buyer@test.com").count() == 3
+    db.close()
+
+
+def test_sweeper_expires_overdue_licenses(setup_database):
+    """Test the sweeper flips overdue licenses and leaves current ones alone"""
+    db = TestingSessionLocal()
+    db.add_all([
+        License(id="overdue-1", token="overdue-token", owner_email="late@test.com", plan="basic",
+                expires_at=datetime.utcnow() - timedelta(days=1)),
+        License(id="current-1", token="current-token", owner_email="late@test.com", plan="basic",
+                expires_at=datetime.utcnow() + timedelta(days=1)),
+    ])
+    db.commit()
+    
+    assert license_expiry.sweep() == 1
+    
+    db.expire_all()
+    statuses = {l.id: l.status for l in db.query(License).filter(License.owner_email == "late@test.com")}
+    assert statuses == {"overdue-1": LicenseStatus.EXPIRED, "current-1": LicenseStatus.ACTIVE}
+    db.close()
+
+
+def test_activate_and_validate_by_human_key(admin_token):
+    """Test the human-readable key works in any case and with or without dashes"""
+    license_data = test_generate_license(admin_token)
+    sloppy_key = license_data["human_key"].replace("-", "").lower()
+    
+    response = client.post(
+        "/api/v1/licenses/activate",
+        json={"token": sloppy_key, "hwid": "test-hwid-789"}
+    )
+    assert response.status_code == 200
+    assert response.json()["license_id"] == license_data["license_id"]
+    assert response.json()["token"] == license_data["token"]
+    
+    response = client.post(
+        "/api/v1/licenses/validate",
+        json={"license_key": f" {license_data['human_key'].lower()} ", "hwid": "test-hwid-789"}
+    )
+    assert response.status_code == 200
+    assert response.json()["valid"] is True
+    
+    response = client.post(
+        "/api/v1/licenses/validate",
+        json={"license_key": "LFT-0000-0000-0000-0000", "hwid": "test-hwid-789"}
+    )
+    assert response.status_code == 404
+
+
+def test_admin_license_search(admin_token):
+    """Test admin search by key prefix, email substring and short email prefix"""
+    license_data = test_generate_license(admin_token)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    
+    for term in [license_data["human_key"][:7].lower(), "ustomer@tes", "cu"]:
+        response = client.get("/api/v1/admin/licenses", params={"search": term}, headers=headers)
+        assert response.status_code == 200
+        ids = [lic["id"] for lic in response.json()["licenses"]]
+        assert license_data["license_id"] in ids
+
+
+def test_admin_license_list_keyset_pages(admin_token):
+    """Test cursor pages walk the whole list without overlap"""
+    for _ in range(3):
+        test_generate_license(admin_token)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    
+    first = client.get("/api/v1/admin/licenses", params={"total": "exact"}, headers=headers).json()
+    seen, cursor = [], None
+    for _ in range(first["total"] // 2 + 1):
+        params = {"limit": 2, "total": "none"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/admin/licenses", params=params, headers=headers).json()
+        assert page["total"] is None
+        seen.extend(lic["id"] for lic in page["licenses"])
+        assert page["next_cursor"] != cursor
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    else:
+        pytest.fail("keyset paging did not reach the last page")
+    
+    assert len(seen) == len(set(seen)) == first["total"]
+    assert client.get("/api/v1/admin/licenses", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_admin_stats_track_license_changes(admin_token):
+    """Test dashboard counters follow license issue and revoke"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    before = client.get("/api/v1/admin/stats", headers=headers).json()["licenses"]
+    
+    license_data = test_generate_license(admin_token)
+    client.post(f"/api/v1/licenses/revoke/{license_data['license_id']}", headers=headers)
+    
+    after = client.get("/api/v1/admin/stats", headers=headers).json()["licenses"]
+    assert after["total"] == before["total"] + 1
+    assert after["active"] == before["active"]
+    assert after["recent_activations"] == before["recent_activations"] + 1
+
+
+def test_admin_license_timeseries(admin_token):
+    """Test issued licenses show up in the daily license series"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    today = datetime.utcnow().date().isoformat()
+    
+    def issued_today():
+        response = client.get("/api/v1/admin/analytics/licenses", params={"start": today, "end": today}, headers=headers)
+        assert response.status_code == 200
+        return sum(point["issued"] for point in response.json()["series"])
+    
+    before = issued_today()
+    test_generate_license(admin_token)
+    assert issued_today() == before + 1
+    
+    response = client.get("/api/v1/admin/analytics/licenses", params={"interval": "year"}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_rollup_days_are_utc():
+    """Test rollup days are UTC calendar days whatever offset a timestamp carries"""
+    evening_at_minus_five = datetime(2026, 3, 1, 21, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert daily_rollups.utc_day(evening_at_minus_five) == date(2026, 3, 2)
+    assert daily_rollups.utc_day(datetime(2026, 3, 1, 23, 59)) == date(2026, 3, 1)
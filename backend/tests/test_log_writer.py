@@ -0,0 +1,87 @@
+import time
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.database import Base, engine, SessionLocal
+from app.models import Log, MessageStatus
+from app.models_enhanced import CampaignLog
+from app.services.log_writer import LogWriter
+
+
+@pytest.fixture(scope="module")
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_write_through_when_not_running(setup_database):
+    """Entries are written immediately when the flusher thread is not running"""
+    writer = LogWriter(bind=engine)
+    writer.log(campaign_id=1, contact_id=1, status=MessageStatus.SENT, detail="ok")
+    
+    db = SessionLocal()
+    assert db.query(Log).filter(Log.campaign_id == 1).count() == 1
+    db.close()
+
+
+def test_buffered_entries_flushed_on_stop(setup_database):
+    """Entries queued while running are batched and flushed on shutdown"""
+    writer = LogWriter(batch_size=50, flush_interval=60, bind=engine)
+    writer.start()
+    for i in range(120):
+        writer.log(campaign_id=2, contact_id=i, status=MessageStatus.QUEUED)
+        writer.campaign_log(campaign_id=2, log_type="info", message=f"queued {i}")
+    writer.stop()
+    
+    db = SessionLocal()
+    assert db.query(Log).filter(Log.campaign_id == 2).count() == 120
+    assert db.query(CampaignLog).filter(CampaignLog.campaign_id == 2).count() == 120
+    db.close()
+
+
+def test_full_queue_drops_without_blocking(setup_database, monkeypatch):
+    """Backpressure never stalls the caller; overflow is dropped and counted"""
+    monkeypatch.setattr(LogWriter, "running", property(lambda self: True))
+    writer = LogWriter(max_queue_size=1, bind=engine)
+    
+    started = time.monotonic()
+    writer.log(campaign_id=3, status=MessageStatus.SENT)
+    writer.log(campaign_id=3, status=MessageStatus.SENT)
+    
+    assert time.monotonic() - started < 0.5
+    assert writer.dropped == 1
+
+
+class FlakyBind:
+    """Engine stand-in whose first `failures` transactions fail to connect"""
+    
+    def __init__(self, failures):
+        self.failures = failures
+    
+    def begin(self):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        return engine.begin()
+
+
+def test_failed_write_is_retried_once(setup_database):
+    """A transient failure is retried instead of losing the batch"""
+    writer = LogWriter(bind=FlakyBind(failures=1))
+    writer.log(campaign_id=4, status=MessageStatus.SENT)
+    
+    db = SessionLocal()
+    assert db.query(Log).filter(Log.campaign_id == 4).count() == 1
+    db.close()
+    assert writer.dropped == 0
+
+
+def test_batch_requeued_while_database_is_down(setup_database, monkeypatch):
+    """After the retry fails, a running writer puts the batch back on the queue"""
+    monkeypatch.setattr(LogWriter, "running", property(lambda self: True))
+    writer = LogWriter(bind=FlakyBind(failures=2))
+    entries = [(Log.__table__, {"campaign_id": 5, "status": MessageStatus.SENT})]
+    
+    assert writer._write(entries) is False
+    assert writer._drain(block=False) == entries
+    assert writer.dropped == 0
@@ -0,0 +1,89 @@
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from app.main import app
+from app.database import Base, engine, get_db
+from app.models import Payment, PaymentStatus, User
+from app.redis_client import redis_client
+from app.response_cache import response_cache
+from sqlalchemy.orm import sessionmaker
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user_token(setup_database):
+    """Register a user and return an access token"""
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "payments@test.com", "password": "testpass123"}
+    )
+    if response.status_code != 200:
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": "payments@test.com", "password": "testpass123"}
+        )
+    return response.json()["access_token"]
+
+
+def test_payment_webhook_invalidates_history(user_token):
+    """A completed payment shows up even for a client holding the old ETag"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.email == "payments@test.com").first()
+    db.add(Payment(user_id=user.id, provider="razorpay", provider_payment_id="order_history_1",
+                   amount=499, currency="INR", plan="premium", status=PaymentStatus.PENDING))
+    db.commit()
+    db.close()
+    
+    etag = client.get("/api/v1/payments/history", headers=headers).headers["etag"]
+    assert client.get("/api/v1/payments/history", headers={**headers, "If-None-Match": etag}).status_code == 304
+    
+    client.post("/api/v1/payments/webhook/razorpay", json={
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {"id": "pay_1", "order_id": "order_history_1"}}}
+    })
+    response = client.get("/api/v1/payments/history", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["payments"][0]["status"] == "completed"
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/payments/history",
+                    "query_string": b"", "headers": []})
+
+
+def test_fill_after_invalidate_is_dropped():
+    """A read that started before a write can't cache its stale body afterwards"""
+    try:
+        redis_client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis not available")
+    scope = "payments:test-race"
+    response_cache.invalidate(scope)
+    
+    stale_read = make_request()
+    assert response_cache.lookup(stale_read, scope, 1) is None
+    response_cache.invalidate(scope)  # the write commits while the read is in flight
+    response_cache.respond(stale_read, scope, 1, {"payments": ["stale"]})
+    
+    assert response_cache.lookup(make_request(), scope, 1) is None
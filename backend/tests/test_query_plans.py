@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, engine
+from app.models import Campaign, CampaignStatus, Contact, Device, Log, Payment
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Router query shapes and the index each one must be planned on
+ROUTER_QUERIES = {
+    "campaigns.list_campaigns": (
+        lambda db: db.query(Campaign).filter(
+            Campaign.user_id == 1,
+            Campaign.status != CampaignStatus.DELETING
+        ).order_by(Campaign.created_at.desc()),
+        "ix_campaigns_user_id_created_at",
+    ),
+    "campaigns.get_campaign": (
+        lambda db: db.query(Contact.status, func.count()).filter(
+            Contact.campaign_id == 1
+        ).group_by(Contact.status),
+        "ix_contacts_campaign_id_status",
+    ),
+    "campaigns.get_campaign_logs": (
+        lambda db: db.query(Log).filter(Log.contact_id == 1).order_by(Log.timestamp.desc()),
+        "ix_logs_contact_id_timestamp",
+    ),
+    "licenses.activate_license": (
+        lambda db: db.query(Device).filter(Device.license_id == "license-1", Device.hwid == "hwid-1"),
+        "ix_devices_license_id_hwid",
+    ),
+    "payments.get_payment_history": (
+        lambda db: db.query(Payment).filter(Payment.user_id == 1).order_by(Payment.created_at.desc()),
+        "ix_payments_user_id_created_at",
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def query_plan(db, query) -> str:
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        # Tables are empty here, so make sequential scans unattractive rather than impossible
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = db.execute(text(f"EXPLAIN {sql}")).all()
+        db.rollback()
+        return "\n".join(row[0] for row in rows)
+    return "\n".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all())
+
+
+@pytest.mark.parametrize("name", sorted(ROUTER_QUERIES))
+def test_router_query_uses_index(db, name):
+    """Test each hot router query is planned on its composite index"""
+    build, index = ROUTER_QUERIES[name]
+    plan = query_plan(db, build(db))
+    assert index in plan, f"{name} is not using {index}:\n{plan}"
@@ -0,0 +1,40 @@
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.rate_limit import RateLimitMiddleware
+
+inner = FastAPI()
+
+
+@inner.post("/api/v1/auth/login")
+async def login():
+    return {"ok": True}
+
+
+@inner.get("/api/v1/health")
+async def health():
+    return {"status": "healthy"}
+
+
+def test_local_denial_returns_retry_after():
+    """A principal remembered as denied is rejected without asking Redis"""
+    limiter = RateLimitMiddleware(inner)
+    limiter._denied_until["ratelimit:/api/v1/auth/login:ip:testclient"] = time.monotonic() + 30
+    client = TestClient(limiter)
+    
+    response = client.post("/api/v1/auth/login")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    
+    # Exempt paths are never limited
+    assert client.get("/api/v1/health").status_code == 200
+
+
+def test_allows_requests_when_redis_unavailable():
+    """The limiter fails open and skips Redis while it is down"""
+    limiter = RateLimitMiddleware(inner)
+    limiter._redis_down_until = time.monotonic() + 30
+    client = TestClient(limiter)
+    
+    for _ in range(20):
+        assert client.post("/api/v1/auth/login").status_code == 200
@@ -0,0 +1,53 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from app.config import settings
+from app.replicas import ReplicaSet
+
+
+def measured(replica_set, *lags):
+    """Mark each replica as freshly checked with the given lag (None = unreachable)"""
+    for replica, lag in zip(replica_set.replicas, lags):
+        replica.lag = lag
+        replica.checked_at = time.monotonic()
+
+
+def test_skips_lagging_and_unreachable_replicas():
+    """Only replicas within the lag limit are picked"""
+    replicas = ReplicaSet(["sqlite:///./replica_a.db", "sqlite:///./replica_b.db", "sqlite:///./replica_c.db"])
+    measured(replicas, settings.REPLICA_MAX_LAG_SECONDS + 1, None, 0.0)
+
+    for _ in range(5):
+        assert replicas.pick() is replicas.replicas[2]
+
+
+def test_falls_back_to_primary_when_no_replica_is_usable():
+    """With every replica behind, reads go to the primary"""
+    replicas = ReplicaSet(["sqlite:///./replica_a.db", "sqlite:///./replica_b.db"])
+    measured(replicas, settings.REPLICA_MAX_LAG_SECONDS + 1, None)
+
+    assert replicas.pick() is None
+
+
+def test_rotates_across_healthy_replicas():
+    """Healthy replicas share the read load"""
+    replicas = ReplicaSet(["sqlite:///./replica_a.db", "sqlite:///./replica_b.db"])
+    measured(replicas, 0.0, 0.5)
+
+    picked = {id(replicas.pick()) for _ in range(4)}
+    assert picked == {id(r) for r in replicas.replicas}
+
+
+def test_unreachable_async_replica_falls_back_to_primary(monkeypatch):
+    """Raw connection errors from the async driver mark the replica unusable"""
+    replicas = ReplicaSet(["sqlite:///./replica_a.db"])
+    replica = replicas.replicas[0]
+    monkeypatch.setattr(replica, "async_engine", SimpleNamespace(dialect=SimpleNamespace(name="postgresql")))
+    
+    async def refused():
+        raise ConnectionRefusedError("connection refused")
+    monkeypatch.setattr(replica, "_probe_async", refused)
+    
+    assert asyncio.run(replicas.pick_async()) is None
+    assert replica.lag is None
+    assert not replica.needs_check()
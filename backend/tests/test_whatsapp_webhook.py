@@ -0,0 +1,120 @@
+import json
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from app.main import app
+from app.config import settings
+from app.services import webhook_ingest
+from app.services.webhook_ingest import extract_statuses, collapse_statuses
+
+client = TestClient(app)
+
+
+def status_payload(statuses):
+    return {"entry": [{"changes": [{"value": {"statuses": statuses}}]}]}
+
+
+def test_verify_webhook(monkeypatch):
+    """Verification echoes the challenge only for the configured token"""
+    monkeypatch.setattr(settings, "WHATSAPP_VERIFY_TOKEN", "verify-me")
+    params = {"hub.mode": "subscribe", "hub.verify_token": "verify-me", "hub.challenge": "42"}
+    
+    response = client.get("/api/v1/whatsapp/webhook", params=params)
+    assert response.status_code == 200
+    assert response.text == "42"
+    
+    params["hub.verify_token"] = "wrong"
+    response = client.get("/api/v1/whatsapp/webhook", params=params)
+    assert response.status_code == 403
+
+
+def test_collapse_keeps_most_advanced_status():
+    """Out-of-order receipts for one message collapse to the furthest state"""
+    statuses = extract_statuses(status_payload([
+        {"id": "wamid.1", "status": "read", "timestamp": "1700000010"},
+        {"id": "wamid.1", "status": "delivered", "timestamp": "1700000005"},
+        {"id": "wamid.2", "status": "sent", "timestamp": "1700000000"},
+        {"id": "wamid.3", "status": "unknown", "timestamp": "1700000000"},
+    ]))
+    
+    collapsed = {s["id"]: s["status"] for s in collapse_statuses(statuses)}
+    assert collapsed == {"wamid.1": "read", "wamid.2": "sent"}
+
+
+def test_extract_converts_timestamps_and_errors():
+    """Statuses arrive ready for the batched UPDATE"""
+    statuses = extract_statuses(status_payload([
+        {"id": "wamid.4", "status": "failed", "timestamp": "1700000020",
+         "errors": [{"code": 131026, "title": "Message undeliverable"}]},
+    ]))
+    
+    assert statuses == [{
+        "id": "wamid.4",
+        "status": "failed",
+        "ts": 1700000020,
+        "error_code": "131026",
+        "error_message": "Message undeliverable"
+    }]
+
+
+@pytest.mark.parametrize("status", [
+    {"id": "wamid.5", "status": "sent", "timestamp": "yesterday"},
+    {"id": "wamid.5", "status": "failed", "timestamp": "1700000000", "errors": {"code": 1}},
+])
+def test_extract_rejects_malformed_statuses(status):
+    """A bad status fails its own payload instead of the whole consumer batch"""
+    with pytest.raises((ValueError, TypeError)):
+        extract_statuses(status_payload([status]))
+
+
+class FakeQueue:
+    """Redis stand-in for the webhook queue lists"""
+    
+    def __init__(self, payloads):
+        self.lists = {settings.WEBHOOK_QUEUE_KEY: list(payloads)}
+    
+    def blpop(self, keys, timeout=0):
+        items = self.lists.get(keys[0])
+        return (keys[0], items.pop(0)) if items else None
+    
+    def lpop(self, key, count):
+        items = self.lists.get(key, [])
+        popped, self.lists[key] = items[:count], items[count:]
+        return popped
+    
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+
+class FakeEngine:
+    """Engine stand-in whose transactions optionally fail at commit"""
+    
+    def __init__(self, fail_commit):
+        self.fail_commit = fail_commit
+    
+    @contextmanager
+    def begin(self):
+        yield None
+        if self.fail_commit:
+            raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+
+def test_failed_commit_publishes_nothing(monkeypatch):
+    """Cache and logs are only touched once the status batch has committed"""
+    payload = json.dumps(status_payload([{"id": "wamid.6", "status": "delivered", "timestamp": "1700000030"}]))
+    queue = FakeQueue([payload])
+    published = []
+    monkeypatch.setattr(webhook_ingest, "redis_client", queue)
+    monkeypatch.setattr(webhook_ingest, "engine", FakeEngine(fail_commit=True))
+    monkeypatch.setattr(webhook_ingest, "apply_statuses", lambda conn, updates: (["row"], [], []))
+    monkeypatch.setattr(webhook_ingest, "publish_statuses", lambda *applied: published.append(applied))
+    
+    with pytest.raises(OperationalError):
+        webhook_ingest.consume_batch()
+    assert published == []
+    assert queue.lists[settings.WEBHOOK_QUEUE_KEY] == [payload]
+    
+    monkeypatch.setattr(webhook_ingest, "engine", FakeEngine(fail_commit=False))
+    assert webhook_ingest.consume_batch() == 1
+    assert published == [(["row"], [], [])]